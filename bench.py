@@ -0,0 +1,240 @@
+"""找图基准：pic/ 里每个模板（以及 thresholds 里的多模板组）在一批截图上跑一遍，
+统计耗时分位数、每次调用截图次数、内存峰值，以及在当前阈值下的准确率/召回率。
+
+    python bench.py 截图目录 [--repeat 5] [--json after.json] [--compare before.json]
+    python bench.py 截图目录 --workers 1,2,4     并行找图的线程数对比（吞吐量 / 加速比）
+
+截图目录里可以放 labels.json 标注每张图上目标的中心点：
+    {"shot_001.png": {"acoin": [[1850, 40]], "tree4": [[300, 500], [420, 610]]}, ...}
+labels.json 里列出的截图上，没有标注的模板就当作"不应该出现"；没列出的截图只测耗时。
+"""
+import argparse
+import importlib
+import json
+import os
+import time
+import tracemalloc
+
+from capture import FileBackend, use_backend
+from hints import hints
+from inputs import FakeSink, use_sink
+from matching import set_workers
+from templates import registry
+import tasks
+
+
+class CountingBackend:
+    def __init__(self, inner):
+        self.inner = inner
+        self.captures = 0
+
+    def size(self):
+        return self.inner.size()
+
+    def grab(self, region):
+        self.captures += 1
+        return self.inner.grab(region)
+
+
+def load_corpus(corpus_dir):
+    labels_path = os.path.join(corpus_dir, 'labels.json')
+    labels = {}
+    if os.path.exists(labels_path):
+        with open(labels_path, encoding='utf-8') as f:
+            labels = json.load(f)
+    shots = []
+    for file in sorted(os.listdir(corpus_dir)):
+        if file.lower().endswith(FileBackend.EXTENSIONS):
+            shots.append((file, CountingBackend(FileBackend(os.path.join(corpus_dir, file))), labels.get(file)))
+    return shots
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def score_points(found, expected, tolerance):
+    """返回 (tp, fp, fn)：找到的点和标注点距离都在 tolerance 内算对上，一个标注只能对上一次"""
+    remaining = [tuple(p) for p in expected]
+    tp = fp = 0
+    for x, y in found:
+        match = next((p for p in remaining if abs(p[0] - x) <= tolerance and abs(p[1] - y) <= tolerance), None)
+        if match is None:
+            fp += 1
+        else:
+            tp += 1
+            remaining.remove(match)
+    return tp, fp, len(remaining)
+
+
+def targets(names=None):
+    """[(kind, name)]：pic/ 下每张单图，加上 thresholds 里的多模板组"""
+    if names:
+        result = []
+        for name in names:
+            result.append(('family' if name in tasks.thresholds else 'single', name))
+        return result
+    singles = [('single', name) for name in registry.names()]
+    families = [('family', name) for name in tasks.thresholds if registry.family(name)]
+    return singles + families
+
+
+def run(corpus_dir, module_name='axie_land', names=None, repeat=5, threshold=None, tolerance=15):
+    importlib.import_module(module_name)  # 按脚本的 profile 配置 tasks
+    use_sink(FakeSink())
+    hints.enabled = False
+    shots = load_corpus(corpus_dir)
+    if not shots:
+        raise FileNotFoundError(f"目录里没有截图: {corpus_dir}")
+
+    def call(kind, name):
+        if kind == 'single':
+            pos = tasks.image(name, threshold=threshold, click_times=0)
+            return [pos] if pos is not None else []
+        result = tasks.image_multi([name], thresholds=tasks.thresholds)
+        return [(cx, cy) for cx, cy, _ in result.get(name, [])]
+
+    rows = []
+    for kind, name in targets(names):
+        latencies = []
+        captures = 0
+        calls = 0
+        peak = 0
+        tp = fp = fn = 0
+        for file, backend, labels in shots:
+            use_backend(backend)
+            tracemalloc.start()
+            found = call(kind, name)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            if labels is not None:
+                expected = labels.get(name, [])
+                s_tp, s_fp, s_fn = score_points(found, expected, tolerance)
+                if kind == 'single':
+                    # image() 只返回最好的一个点，标注里多出来的目标不算漏检
+                    s_fn = 1 if expected and not s_tp else 0
+                tp, fp, fn = tp + s_tp, fp + s_fp, fn + s_fn
+
+            start_captures = backend.captures
+            for _ in range(repeat):
+                start = time.perf_counter()
+                call(kind, name)
+                latencies.append((time.perf_counter() - start) * 1000)
+            captures += backend.captures - start_captures
+            calls += repeat
+
+        rows.append({
+            'name': name,
+            'kind': kind,
+            'calls': calls,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'total_ms': sum(latencies),
+            'captures_per_call': captures / calls if calls else 0,
+            'peak_kb': peak / 1024,
+            'tp': tp,
+            'fp': fp,
+            'fn': fn,
+            'precision': tp / (tp + fp) if tp + fp else None,
+            'recall': tp / (tp + fn) if tp + fn else None,
+        })
+    return {
+        'meta': {'corpus': corpus_dir, 'module': module_name, 'screenshots': len(shots), 'repeat': repeat,
+                 'threshold': threshold, 'tolerance': tolerance, 'cpu_count': os.cpu_count(),
+                 'created': time.time()},
+        'templates': rows,
+    }
+
+
+def scaling(corpus_dir, module_name='axie_land', names=None, repeat=5, threshold=None, tolerance=15,
+            workers=(1, 2, 4)):
+    """同一批截图按不同线程数各跑一遍，返回 [{workers, calls, seconds, calls_per_s, speedup}]"""
+    rows = []
+    previous = None
+    try:
+        for count in workers:
+            last = set_workers(count)
+            previous = last if previous is None else previous
+            report = run(corpus_dir, module_name, names, repeat, threshold, tolerance)
+            calls = sum(row['calls'] for row in report['templates'])
+            seconds = sum(row['total_ms'] for row in report['templates']) / 1000
+            rows.append({'workers': count, 'calls': calls, 'seconds': seconds,
+                         'calls_per_s': calls / seconds if seconds else None})
+    finally:
+        if previous is not None:
+            set_workers(previous)
+    base = rows[0]['calls_per_s'] if rows else None
+    for row in rows:
+        row['speedup'] = row['calls_per_s'] / base if base and row['calls_per_s'] else None
+    return rows
+
+
+def print_scaling(rows):
+    print(f"CPU 核数: {os.cpu_count()}")
+    print(f"{'线程':>6}{'调用':>8}{'耗时s':>10}{'次/秒':>10}{'加速比':>8}")
+    for row in rows:
+        print(f"{row['workers']:>6}{row['calls']:>8}{row['seconds']:>10.2f}"
+              f"{_fmt(row['calls_per_s'], '.1f'):>10}{_fmt(row['speedup'], '.2f'):>8}")
+
+
+def _fmt(value, spec):
+    return '-' if value is None else format(value, spec)
+
+
+def print_report(report, baseline=None):
+    before = {}
+    if baseline:
+        before = {(row['kind'], row['name']): row for row in baseline['templates']}
+    print(f"{'模板':<20}{'类型':<8}{'p50ms':>8}{'p95ms':>8}{'p99ms':>8}{'截图/次':>8}{'内存KB':>9}"
+          f"{'准确率':>8}{'召回率':>8}" + ("  p50变化" if baseline else ""))
+    for row in report['templates']:
+        line = (f"{row['name']:<20}{row['kind']:<8}{_fmt(row['p50_ms'], '.2f'):>8}{_fmt(row['p95_ms'], '.2f'):>8}"
+                f"{_fmt(row['p99_ms'], '.2f'):>8}{row['captures_per_call']:>8.2f}{row['peak_kb']:>9.0f}"
+                f"{_fmt(row['precision'], '.2f'):>8}{_fmt(row['recall'], '.2f'):>8}")
+        old = before.get((row['kind'], row['name']))
+        if old and old['p50_ms'] and row['p50_ms']:
+            line += f"  {row['p50_ms'] / old['p50_ms'] - 1:+.0%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="找图耗时 / 准确率基准")
+    parser.add_argument('corpus', help="截图目录")
+    parser.add_argument('names', nargs='*', help="只测这些模板（默认全部）")
+    parser.add_argument('--module', default='axie_land')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="单图的阈值，默认和 image() 一样（thresholds.json 里校准过的值，否则 0.8）")
+    parser.add_argument('--tolerance', type=int, default=15, help="找到的点离标注多少像素以内算对")
+    parser.add_argument('--json', default=None, help="把结果写成 json")
+    parser.add_argument('--compare', default=None, help="和之前的 json 结果对比")
+    parser.add_argument('--workers', default=None, help="逗号分隔的线程数，如 1,2,4：只做并行吞吐量对比")
+    args = parser.parse_args()
+
+    if args.workers:
+        workers = [int(count) for count in args.workers.split(',')]
+        rows = scaling(args.corpus, args.module, args.names, args.repeat, args.threshold, args.tolerance, workers)
+        print_scaling(rows)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump({'cpu_count': os.cpu_count(), 'scaling': rows}, f, ensure_ascii=False, indent=1)
+        return
+
+    report = run(args.corpus, args.module, args.names, args.repeat, args.threshold, args.tolerance)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+
+
+if __name__ == '__main__':
+    main()
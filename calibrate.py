@@ -0,0 +1,222 @@
+"""用标注好的截图自动定阈值：每个模板在所有截图上算一遍分数，分成"该命中"和"不该命中"两堆，
+取 F1 最高的阈值写进 thresholds.json，image() / image_multi() 启动时读取。
+
+    python calibrate.py 截图目录 [模板 ...] [--out thresholds.json] [--tolerance 15]
+
+截图目录和 bench.py 一样，要有 labels.json；没列在 labels.json 里的截图不参与校准。
+每个模板至少要有 MIN_POSITIVES 个标注过的命中才会定阈值，新阈值最多比 F1 最高点低 MAX_DROP。
+两堆分数有重叠（不该命中的最高分 >= 该命中的最低分）的模板会标出来，说明光靠阈值分不开，
+需要换模板、加遮罩或者限定区域。
+只校准彩色匹配（image() 默认的 color=True）；灰度匹配的分数分布不一样，color=False 的调用不用这里的阈值。
+"""
+import argparse
+import importlib
+import json
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+from bench import load_corpus
+from capture import use_backend
+from frame import Frame
+from hints import hints
+from matching import color_diff, match_family, match_template
+from templates import registry, THRESHOLDS_FILE, DEFAULT_GRAY_DIFF
+import tasks
+
+
+MIN_SCORE = 0.5  # 多模板组低于这个分数的峰值不统计，当作没找到
+MIN_POSITIVES = 5  # 该命中的样本少于这么多就不给这个模板定阈值，继续用默认值
+MAX_DROP = 0.03    # 阈值最多比 F1 最高的那个分数低这么多
+
+
+def single_scores(frame, entry, expected, tolerance):
+    """返回 ([(标注点附近的最高分, 颜色均差)], [(其余地方的最高分, 颜色均差)])"""
+    result = match_template(frame.bgr, entry.bgr, entry.mask_view(True))
+    rh, rw = result.shape
+    masked = result.copy()
+    positives = []
+    for x, y in expected:
+        # 标注的是中心点，换成 matchTemplate 结果图里的左上角坐标
+        lx, ly = x - frame.offset[0] - entry.anchor[0], y - frame.offset[1] - entry.anchor[1]
+        x1, y1 = max(0, lx - tolerance), max(0, ly - tolerance)
+        x2, y2 = min(rw, lx + tolerance + 1), min(rh, ly + tolerance + 1)
+        if x1 >= x2 or y1 >= y2:
+            continue
+        window = result[y1:y2, x1:x2]
+        dy, dx = np.unravel_index(np.argmax(window), window.shape)
+        px, py = x1 + dx, y1 + dy
+        area = frame.bgr[py:py + entry.h, px:px + entry.w]
+        positives.append((float(window[dy, dx]), float(color_diff(area, entry.mask))))
+        masked[y1:y2, x1:x2] = -1
+    _, max_val, _, (nx, ny) = cv2.minMaxLoc(masked)
+    area = frame.bgr[ny:ny + entry.h, nx:nx + entry.w]
+    negatives = [(float(max_val), float(color_diff(area, entry.mask)))] if max_val > -1 else []
+    return positives, negatives
+
+
+def family_scores(frame, templates, expected, tolerance):
+    """低阈值找出组里所有峰值，对上标注的算该命中，其余算不该命中；没对上的标注记 0 分"""
+    hits = match_family(frame, templates, MIN_SCORE)
+    remaining = [tuple(p) for p in expected]
+    positives, negatives = [], []
+    for cx, cy, score, _ in hits:
+        match = next((p for p in remaining if abs(p[0] - cx) <= tolerance and abs(p[1] - cy) <= tolerance), None)
+        if match is None:
+            negatives.append((score, None))
+        else:
+            positives.append((score, None))
+            remaining.remove(match)
+    positives += [(0.0, None)] * len(remaining)
+    return positives, negatives
+
+
+def choose_threshold(positives, negatives):
+    """在所有"该命中"的分数里挑 F1 最高的阈值（一样高取更严的），再往下放到和下一个负样本的中间，最多放 MAX_DROP
+
+    返回 (阈值, 准确率, 召回率)；样本不到 MIN_POSITIVES 个返回 (None, None, None)。
+    """
+    if len(positives) < MIN_POSITIVES:
+        return None, None, None
+    best = None
+    for t in sorted(set(positives)):
+        if t <= 0:
+            continue
+        tp = sum(1 for s in positives if s >= t)
+        fp = sum(1 for s in negatives if s >= t)
+        fn = len(positives) - tp
+        f1 = 2 * tp / (2 * tp + fp + fn)
+        if best is None or (f1, t) >= (best[0], best[1]):
+            best = (f1, t, tp, fp, fn)
+    if best is None:
+        return None, None, None
+    _, t, tp, fp, fn = best
+    below = [s for s in negatives if s < t]
+    floor = max(below) if below else MIN_SCORE
+    threshold = round(max((t + floor) / 2, t - MAX_DROP), 3)
+    return threshold, tp / (tp + fp) if tp + fp else None, tp / (tp + fn) if tp + fn else None
+
+
+def choose_gray_diff(positives, negatives):
+    """颜色均差低于阈值的命中会被当成太灰丢掉：默认值会误丢正样本时才往下调，不往上调
+
+    样本少的时候往上调很容易把没见过的正常画面也当成太灰丢掉，所以最多用默认值。
+    """
+    pos = [d for _, d in positives if d is not None]
+    if len(pos) < MIN_POSITIVES:
+        return None
+    return max(0, min(DEFAULT_GRAY_DIFF, math.floor(min(pos)) - 1))
+
+
+def summarize(name, kind, positives, negatives):
+    pos = [s for s, _ in positives]
+    neg = [s for s, _ in negatives]
+    threshold, precision, recall = choose_threshold(pos, neg)
+    row = {
+        'name': name, 'kind': kind, 'positives': len(pos), 'negatives': len(neg),
+        'pos_min': min(pos) if pos else None, 'neg_max': max(neg) if neg else None,
+        'threshold': threshold, 'precision': precision, 'recall': recall,
+    }
+    row['overlap'] = bool(pos and neg and row['neg_max'] >= row['pos_min'])
+    if kind == 'single':
+        row['gray_diff'] = choose_gray_diff(positives, negatives)
+    return row
+
+
+def calibrate(corpus_dir, names=None, module_name='axie_land', tolerance=15):
+    importlib.import_module(module_name)  # 按脚本的 profile 配置 tasks
+    hints.enabled = False
+    shots = [(file, backend, labels) for file, backend, labels in load_corpus(corpus_dir) if labels is not None]
+    if not shots:
+        raise FileNotFoundError(f"{corpus_dir} 里没有带标注（labels.json）的截图")
+    if not names:
+        names = registry.names() + [name for name in tasks.thresholds if registry.family(name)]
+
+    frames = []
+    for file, backend, labels in shots:
+        use_backend(backend)
+        frames.append((file, Frame.capture(), labels))
+
+    rows = []
+    for name in names:
+        positives, negatives = [], []
+        family = name in tasks.thresholds and registry.family(name)
+        entry = None if family else registry.get(name)
+        if not family and entry is None:
+            print(f"[WARN] 模板不存在: {name}")
+            continue
+        for file, frame, labels in frames:
+            expected = labels.get(name, [])
+            if family:
+                pos, neg = family_scores(frame, family, expected, tolerance)
+            else:
+                if frame.size[0] < entry.w or frame.size[1] < entry.h:
+                    continue
+                pos, neg = single_scores(frame, entry, expected, tolerance)
+            positives += pos
+            negatives += neg
+        if not positives:
+            continue  # 没有一张截图标过它，定不了阈值
+        rows.append(summarize(name, 'family' if family else 'single', positives, negatives))
+    return rows
+
+
+def write_thresholds(rows, path, corpus_dir):
+    data = {'meta': {'corpus': corpus_dir, 'created': time.time()}, 'single': {}, 'family': {}}
+    for row in rows:
+        if row['threshold'] is None:
+            continue
+        entry = {'threshold': row['threshold'], 'overlap': row['overlap'],
+                 'precision': row['precision'], 'recall': row['recall']}
+        if row.get('gray_diff') is not None:
+            entry['gray_diff'] = row['gray_diff']
+        data[row['kind']][row['name']] = entry
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _fmt(value, spec):
+    return '-' if value is None else format(value, spec)
+
+
+def print_rows(rows):
+    print(f"{'模板':<20}{'类型':<8}{'正样本':>6}{'负样本':>6}{'正最低':>8}{'负最高':>8}{'原阈值':>8}{'新阈值':>8}"
+          f"{'灰度':>6}{'准确率':>8}{'召回率':>8}  重叠")
+    for row in rows:
+        if row['kind'] == 'family':
+            old = tasks.thresholds.get(row['name'])
+        else:
+            old = registry.threshold(row['name'])
+        print(f"{row['name']:<20}{row['kind']:<8}{row['positives']:>6}{row['negatives']:>6}"
+              f"{_fmt(row['pos_min'], '.3f'):>8}{_fmt(row['neg_max'], '.3f'):>8}{_fmt(old, '.2f'):>8}"
+              f"{_fmt(row['threshold'], '.3f'):>8}{_fmt(row.get('gray_diff'), 'd'):>6}"
+              f"{_fmt(row['precision'], '.2f'):>8}{_fmt(row['recall'], '.2f'):>8}  {'是' if row['overlap'] else ''}")
+    overlapping = [row['name'] for row in rows if row['overlap']]
+    if overlapping:
+        print(f"[WARN] 这些模板正负样本分数有重叠，光调阈值分不开: {', '.join(overlapping)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用标注截图校准找图阈值")
+    parser.add_argument('corpus', help="截图目录（需要 labels.json）")
+    parser.add_argument('names', nargs='*', help="只校准这些模板（默认全部）")
+    parser.add_argument('--module', default='axie_land', help="按哪个脚本的配置跑")
+    parser.add_argument('--tolerance', type=int, default=15, help="离标注多少像素以内算命中")
+    parser.add_argument('--out', default=THRESHOLDS_FILE)
+    parser.add_argument('--dry-run', action='store_true', help="只打印，不写文件")
+    args = parser.parse_args()
+
+    rows = calibrate(args.corpus, args.names, args.module, args.tolerance)
+    print_rows(rows)
+    if not args.dry_run:
+        write_thresholds(rows, args.out, args.corpus)
+        print(f"[INFO] 已写入 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+
+class PyAutoGuiBackend:
+    """原来的截图方式：pyautogui.screenshot -> PIL -> numpy RGB"""
+
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def size(self):
+        return tuple(self._pyautogui.size())
+
+    def grab(self, region):
+        x1, y1, x2, y2 = region
+        screenshot = self._pyautogui.screenshot(region=(x1, y1, x2 - x1, y2 - y1))
+        return np.array(screenshot), 'rgb'
+
+
+class MssBackend:
+    """mss 直接抓屏，BGRA 原始数据转成 BGR 写进复用的缓冲区，不经过 PIL
+
+    缓冲区按尺寸轮流复用 ring 个，所以同一尺寸只有最近 ring 张截图的数据是有效的；
+    需要长期保存的截图（录制等）请自己 copy。
+    mss 在 Windows 上的截图句柄只能在创建它的线程里用，所以每个线程各有一个 mss 实例和一套缓冲区。
+    """
+
+    def __init__(self, ring=3):
+        import mss
+        self._mss = mss
+        self._ring = ring
+        self._local = threading.local()
+        self._state()  # 先在创建它的线程里建一个，截不了屏马上就能发现
+
+    def _state(self):
+        local = self._local
+        if not hasattr(local, 'sct'):
+            local.sct = self._mss.mss()
+            local.buffers = {}
+            local.next = {}
+        return local
+
+    def size(self):
+        monitor = self._state().sct.monitors[1]
+        return monitor['width'], monitor['height']
+
+    def _buffer(self, local, h, w):
+        key = (h, w)
+        buffers = local.buffers.setdefault(key, [])
+        index = local.next.get(key, 0)
+        if index >= len(buffers):
+            buffers.append(np.empty((h, w, 3), np.uint8))
+        local.next[key] = (index + 1) % self._ring
+        return buffers[index]
+
+    def grab(self, region):
+        local = self._state()
+        x1, y1, x2, y2 = region
+        monitor = local.sct.monitors[1]
+        shot = local.sct.grab({'left': monitor['left'] + x1, 'top': monitor['top'] + y1,
+                               'width': x2 - x1, 'height': y2 - y1})
+        bgra = np.frombuffer(shot.raw, np.uint8).reshape(shot.height, shot.width, 4)
+        bgr = self._buffer(local, shot.height, shot.width)
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=bgr)
+        return bgr, 'bgr'
+
+
+class FileBackend:
+    """从保存的截图提供画面，不需要游戏和显示器，用来离线测试和跑基准
+
+    path 可以是单张图片，也可以是目录（按文件名排序依次播放）。
+    每次 grab 前进一张，播到最后一张后停住，loop=True 则从头循环。
+    """
+
+    EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+    def __init__(self, path, loop=False):
+        if os.path.isdir(path):
+            self.files = sorted(os.path.join(path, f) for f in os.listdir(path)
+                                if f.lower().endswith(self.EXTENSIONS))
+        else:
+            self.files = [path]
+        if not self.files:
+            raise FileNotFoundError(f"没有可用的截图: {path}")
+        self.loop = loop
+        self.index = 0
+        self._cache = {}
+
+    def _load(self, path):
+        if path not in self._cache:
+            img = cv2.imread(path, cv2.IMREAD_COLOR)
+            if img is None:
+                raise ValueError(f"截图加载失败: {path}")
+            self._cache[path] = img
+        return self._cache[path]
+
+    @property
+    def current(self):
+        return self.files[self.index]
+
+    def size(self):
+        h, w = self._load(self.current).shape[:2]
+        return w, h
+
+    def seek(self, index):
+        self.index = index % len(self.files)
+
+    def grab(self, region):
+        img = self._load(self.current)
+        if self.index + 1 < len(self.files):
+            self.index += 1
+        elif self.loop:
+            self.index = 0
+        x1, y1, x2, y2 = region
+        return img[y1:y2, x1:x2], 'bgr'
+
+
+def default_backend():
+    """AXIE_CAPTURE=pyautogui / mss / file:目录；没设置时有 mss 用 mss，否则 pyautogui"""
+    choice = os.environ.get('AXIE_CAPTURE', '')
+    if choice.startswith('file:'):
+        return FileBackend(choice[len('file:'):])
+    if choice == 'pyautogui':
+        return PyAutoGuiBackend()
+    try:
+        return MssBackend()
+    except ImportError:
+        if choice == 'mss':
+            raise
+        return PyAutoGuiBackend()
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = default_backend()
+    return _backend
+
+
+def use_backend(backend):
+    """切换截图后端，返回原来的后端；任务代码不用改"""
+    global _backend
+    previous = _backend
+    _backend = backend
+    return previous
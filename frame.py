@@ -0,0 +1,117 @@
+import threading
+from contextlib import contextmanager
+
+import cv2
+
+from capture import get_backend
+from metrics import metrics
+
+
+_window = threading.local()
+
+
+def screen_region():
+    """当前线程能用的屏幕区域：在某个窗口的 worker 里就是那个窗口，否则是整个屏幕"""
+    region = getattr(_window, 'region', None)
+    return region or (0, 0, *get_backend().size())
+
+
+def in_window():
+    """是不是在多窗口的某个 worker 线程里"""
+    return getattr(_window, 'region', None) is not None
+
+
+@contextmanager
+def window_region(region):
+    """在这个 with 里，全屏找图、截图、位置记录都只针对 region 这个窗口"""
+    previous = getattr(_window, 'region', None)
+    _window.region = tuple(region)
+    try:
+        yield
+    finally:
+        _window.region = previous
+
+
+class Frame:
+    """一次截图，BGR / 灰度 / 缩小图都是第一次用到时才转换，之后复用"""
+
+    def __init__(self, rgb=None, region=None, bgr=None):
+        self._rgb = rgb
+        self._bgr = bgr
+        self._gray = None
+        self._scaled = {}
+        if region is None:
+            src = bgr if bgr is not None else rgb
+            region = (0, 0, src.shape[1], src.shape[0])
+        self.region = region
+
+    @classmethod
+    def capture(cls, region=None):
+        region = region or screen_region()
+        with metrics.timer('capture_ms'):
+            pixels, order = get_backend().grab(region)
+        metrics.incr('captures')
+        if order == 'bgr':
+            return cls(bgr=pixels, region=region)
+        return cls(pixels, region)
+
+    @property
+    def offset(self):
+        return self.region[0], self.region[1]
+
+    @property
+    def size(self):
+        x1, y1, x2, y2 = self.region
+        return x2 - x1, y2 - y1
+
+    @property
+    def bgr(self):
+        if self._bgr is None:
+            with metrics.timer('convert_ms'):
+                self._bgr = cv2.cvtColor(self._rgb, cv2.COLOR_RGB2BGR)
+        return self._bgr
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            with metrics.timer('convert_ms'):
+                if self._bgr is not None:
+                    self._gray = cv2.cvtColor(self._bgr, cv2.COLOR_BGR2GRAY)
+                else:
+                    self._gray = cv2.cvtColor(self._rgb, cv2.COLOR_RGB2GRAY)
+        return self._gray
+
+    def view(self, color=True):
+        return self.bgr if color else self.gray
+
+    def scaled(self, scale, color=False):
+        """缩小后的图，scale=0.5 即 1/2 分辨率"""
+        key = (scale, color)
+        if key not in self._scaled:
+            with metrics.timer('convert_ms'):
+                self._scaled[key] = cv2.resize(self.view(color), None, fx=scale, fy=scale,
+                                               interpolation=cv2.INTER_AREA)
+        return self._scaled[key]
+
+    def crop(self, region):
+        """按屏幕坐标截取子区域，和原图共享内存，不重新截图"""
+        fx1, fy1, fx2, fy2 = self.region
+        x1, y1, x2, y2 = region
+        x1, y1 = max(x1, fx1), max(y1, fy1)
+        x2, y2 = min(x2, fx2), min(y2, fy2)
+        if (x1, y1, x2, y2) == self.region:
+            return self
+        sx, sy, ex, ey = x1 - fx1, y1 - fy1, x2 - fx1, y2 - fy1
+        sub = Frame(bgr=self.bgr[sy:ey, sx:ex], region=(x1, y1, x2, y2))
+        if self._gray is not None:
+            sub._gray = self._gray[sy:ey, sx:ex]
+        return sub
+
+
+def grab(region=None, frame=None):
+    """有现成的 frame 就裁剪复用，没有才截图"""
+    if frame is None:
+        return Frame.capture(region)
+    if region is None:
+        return frame
+    return frame.crop(region)
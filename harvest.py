@@ -0,0 +1,65 @@
+from frame import Frame
+from inputs import gui
+from matching import match_families, suppress
+import pipeline
+
+
+def detect(keys, thresholds, excluded_points=None, frame=None, min_dx=40, min_dy=40):
+    """一次截图找出 keys 里所有组的全部命中，跨组去重，返回 [(cx, cy, score, 组名)]"""
+    frame = frame or Frame.capture()
+    results, _ = match_families(keys, thresholds, frame=frame, min_dx=min_dx, min_dy=min_dy,
+                                excluded_points=excluded_points)
+    points = [(cx, cy, score, key) for key in keys for cx, cy, score in results.get(key, [])]
+    keep = suppress([p[0] for p in points], [p[1] for p in points], [p[2] for p in points], min_dx, min_dy)
+    return [points[i] for i in keep]
+
+
+def plan_route(points, start):
+    """从 start 出发每次去最近的点（最近邻），返回排好序的点"""
+    remaining = list(points)
+    route = []
+    x, y = start
+    while remaining:
+        nearest = min(remaining, key=lambda p: (p[0] - x) ** 2 + (p[1] - y) ** 2)
+        remaining.remove(nearest)
+        route.append(nearest)
+        x, y = nearest[0], nearest[1]
+    return route
+
+
+def confirm(keys, thresholds, point, frame, min_dx=40, min_dy=40):
+    """在 point 附近的一小块截图 frame 里重新确认目标还在，返回 (cx, cy) 或 None"""
+    x, y = point[0], point[1]
+    results, _ = match_families(keys, thresholds, frame=frame, min_dx=min_dx, min_dy=min_dy)
+    best = None
+    for key in keys:
+        for cx, cy, score in results.get(key, []):
+            if abs(cx - x) < min_dx and abs(cy - y) < min_dy and (best is None or score > best[2]):
+                best = (cx, cy, score)
+    return (best[0], best[1]) if best else None
+
+
+def _report_miss(target):
+    print(f"[MISS] {target[3]} ({target[0]}, {target[1]}) 已经不在了")
+
+
+def harvest(keys, thresholds, count, click, label=''):
+    """全屏找一次、按最近邻顺序依次采集，每次点击前只复查目标附近的小区域（复查和上一次点击同时进行）
+
+    click(cx, cy) 是具体的采集动作；规划里的点采完了还不够 count 个就再全屏找一次。
+    返回已点击的点。
+    """
+    clicked = []
+    while len(clicked) < count:
+        targets = detect(keys, thresholds, excluded_points=clicked)
+        if not targets:
+            break
+        route = plan_route(targets, gui.position())
+        print(f"[INFO] 找到 {len(targets)} 个{label}，按最近邻顺序采集")
+        # 点当前目标时，后台已经在确认下一个目标（第一个点刚全屏找过，不用确认）
+        done = pipeline.run(route, lambda point, frame: confirm(keys, thresholds, point, frame), click,
+                            limit=count - len(clicked), first_checked=True, on_miss=_report_miss)
+        clicked += done
+        if not done:
+            break
+    return clicked
@@ -0,0 +1,113 @@
+import atexit
+import json
+import os
+import threading
+
+from frame import screen_region
+
+
+HINTS_FILE = 'hints.json'
+
+
+class HintStore:
+    """记录每个模板上次出现的位置，下次先在附近找，找不到再全屏
+
+    每个模板记录 box（上次命中的坐标 x1, y1, x2, y2，相对当前窗口左上角）和命中统计，
+    定期写到 hints.json，下次启动直接接着用。
+    """
+
+    def __init__(self, path=HINTS_FILE, pad=40, min_tries=10, min_hit_rate=0.3, save_every=20):
+        self.path = path
+        self.pad = pad
+        self.min_tries = min_tries
+        self.min_hit_rate = min_hit_rate
+        self.save_every = save_every
+        self.enabled = True
+        self.entries = {}
+        self._dirty = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] 读取 {self.path} 失败，忽略位置记录: {e}")
+            self.entries = {}
+
+    def save(self):
+        # path 为 None 时只在内存里用（回放时不能覆盖真实记录）
+        if not self._dirty or self.path is None:
+            return
+        with self._lock:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+            self._dirty = 0
+
+    def _entry(self, name):
+        return self.entries.setdefault(name, {
+            'box': None, 'roi_hits': 0, 'roi_misses': 0, 'full_hits': 0, 'full_misses': 0,
+        })
+
+    def hit_rate(self, name):
+        entry = self.entries.get(name)
+        if not entry:
+            return None
+        tries = entry['roi_hits'] + entry['roi_misses']
+        return entry['roi_hits'] / tries if tries else None
+
+    def roi(self, name):
+        """上次位置外扩 pad 像素的区域；没有记录或者命中率太低（位置不固定的模板）返回 None"""
+        entry = self.entries.get(name)
+        if not self.enabled or not entry or not entry['box']:
+            return None
+        tries = entry['roi_hits'] + entry['roi_misses']
+        if tries >= self.min_tries and entry['roi_hits'] / tries < self.min_hit_rate:
+            return None
+        sx1, sy1, sx2, sy2 = screen_region()
+        x1, y1, x2, y2 = entry['box']
+        x1, y1, x2, y2 = x1 + sx1, y1 + sy1, x2 + sx1, y2 + sy1
+        region = (max(sx1, x1 - self.pad), max(sy1, y1 - self.pad),
+                  min(sx2, x2 + self.pad), min(sy2, y2 + self.pad))
+        if region[0] >= region[2] or region[1] >= region[3]:
+            return None
+        return region
+
+    def record(self, name, box, via_roi):
+        """box 为 None 表示没找到"""
+        if not self.enabled:
+            return
+        sx1, sy1 = screen_region()[:2]
+        with self._lock:
+            entry = self._entry(name)
+            if box is not None:
+                x1, y1, x2, y2 = box
+                entry['box'] = [x1 - sx1, y1 - sy1, x2 - sx1, y2 - sy1]
+            key = ('roi_' if via_roi else 'full_') + ('hits' if box is not None else 'misses')
+            entry[key] += 1
+            self._dirty += 1
+        if self._dirty >= self.save_every:
+            self.save()
+
+    def summary(self):
+        rows = []
+        for name, entry in sorted(self.entries.items()):
+            rows.append((name, entry['roi_hits'], entry['roi_misses'],
+                         entry['full_hits'], entry['full_misses'], self.hit_rate(name)))
+        return rows
+
+
+hints = HintStore()
+atexit.register(hints.save)
+
+
+if __name__ == '__main__':
+    print(f"{'模板':<20}{'附近命中':>8}{'附近落空':>8}{'全屏命中':>8}{'全屏落空':>8}{'附近命中率':>10}")
+    for name, roi_hits, roi_misses, full_hits, full_misses, rate in hints.summary():
+        rate_text = '-' if rate is None else f"{rate:.0%}"
+        print(f"{name:<20}{roi_hits:>8}{roi_misses:>8}{full_hits:>8}{full_misses:>8}{rate_text:>10}")
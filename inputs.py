@@ -0,0 +1,146 @@
+import subprocess
+import threading
+import time
+from contextlib import nullcontext
+
+
+# 会改变游戏画面的操作；录制、回放只关心这些
+INPUT_OPS = ('click', 'moveTo', 'mouseDown', 'mouseUp', 'keyDown', 'keyUp', 'press', 'scroll', 'launch', 'kill')
+
+
+class PyAutoGuiSink:
+    """真正的鼠标键盘输入、等待和启动/关闭游戏"""
+
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def click(self, x, y):
+        self._pyautogui.click(x, y)
+
+    def moveTo(self, x, y, duration=0):
+        self._pyautogui.moveTo(x, y, duration=duration)
+
+    def mouseDown(self, button='left'):
+        self._pyautogui.mouseDown(button=button)
+
+    def mouseUp(self, button='left'):
+        self._pyautogui.mouseUp(button=button)
+
+    def keyDown(self, key):
+        self._pyautogui.keyDown(key)
+
+    def keyUp(self, key):
+        self._pyautogui.keyUp(key)
+
+    def press(self, key):
+        self._pyautogui.press(key)
+
+    def scroll(self, clicks):
+        self._pyautogui.scroll(clicks)
+
+    def position(self):
+        return tuple(self._pyautogui.position())
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def now(self):
+        return time.time()
+
+    def launch(self, path):
+        subprocess.Popen(path)
+
+    def kill(self, image_name):
+        subprocess.run(["taskkill", "/f", "/im", image_name], shell=True)
+
+
+class FakeSink:
+    """不碰真实鼠标键盘：输入只记到 log 里，sleep 只推进虚拟时钟（离线回放、测试用）
+
+    log 里每条是 (虚拟时间, 操作名, args, kwargs)，和调用时传的参数一模一样。
+    """
+
+    def __init__(self, on_input=None):
+        self.log = []
+        self.clock = 0.0
+        self.cursor = (0, 0)
+        self.on_input = on_input
+
+    def __getattr__(self, name):
+        if name not in INPUT_OPS:
+            raise AttributeError(name)
+
+        def fake_input(*args, **kwargs):
+            self.log.append((self.clock, name, args, kwargs))
+            if name in ('click', 'moveTo'):
+                self.cursor = (args[0], args[1])
+            self.clock += kwargs.get('duration', 0)
+            if self.on_input is not None:
+                self.on_input(name, args)
+        return fake_input
+
+    def position(self):
+        return self.cursor
+
+    def sleep(self, seconds):
+        self.clock += seconds
+
+    def now(self):
+        return self.clock
+
+
+_sink = None
+_thread_sink = threading.local()
+
+
+def get_sink():
+    global _sink
+    sink = getattr(_thread_sink, 'sink', None)
+    if sink is not None:
+        return sink
+    if _sink is None:
+        _sink = PyAutoGuiSink()
+    return _sink
+
+
+def use_sink(sink):
+    """切换输入端，返回原来的；任务代码通过 gui 调用，不用改"""
+    global _sink
+    previous = _sink
+    _sink = sink
+    return previous
+
+
+def use_thread_sink(sink):
+    """只在当前线程切换输入端（多窗口时每个 worker 一个），返回原来的"""
+    previous = getattr(_thread_sink, 'sink', None)
+    _thread_sink.sink = sink
+    return previous
+
+
+class _Gui:
+    """gui.click(...) 等调用转发给当前的输入端；inputs 记录一共发过多少次会改变画面的输入"""
+
+    inputs = 0
+
+    def exclusive(self):
+        """with gui.exclusive(): 里的一串输入（比如悬停 -> 看提示 -> 按空格）中间不会被别的窗口插进来
+
+        只有多窗口的 WindowSink 需要；其他输入端什么也不做。
+        """
+        exclusive = getattr(get_sink(), 'exclusive', None)
+        return exclusive() if exclusive is not None else nullcontext()
+
+    def __getattr__(self, name):
+        attr = getattr(get_sink(), name)
+        if name not in INPUT_OPS:
+            return attr
+
+        def counted(*args, **kwargs):
+            _Gui.inputs += 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+gui = _Gui()
@@ -0,0 +1,533 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from frame import grab
+from hints import hints
+from metrics import metrics
+from templates import registry
+
+
+Hit = namedtuple('Hit', ['name', 'x', 'y', 'score'])
+
+# 金字塔模式：先在缩小图上粗找候选，再回原图只在候选附近小区域精确打分。
+# 只给尺寸够大、特征明显的模板开，缩小后短边太小的模板粗匹配不可靠。
+PYRAMID = {
+    'acoin': 0.5,
+    'craft': 0.5,
+    'transfer': 0.5,
+    'inventory': 0.5,
+    'join': 0.5,
+    'claim': 0.5,
+    'discard': 0.5,
+    'destination': 0.5,
+    'confirm': 0.5,
+    'confirm_transfer': 0.5,
+    'cancell': 0.5,
+    'left_arrow': 0.5,
+    'right_arrow': 0.5,
+}
+PYRAMID_MIN_SIDE = 8      # 缩小后模板短边至少这么多像素，否则退回全分辨率
+PYRAMID_MARGIN = 0.15     # 粗匹配阈值比最终阈值低这么多，避免缩小后分数偏低漏掉
+PYRAMID_CANDIDATES = 3    # 粗匹配最多回原图复核几个候选
+
+# 并行匹配：cv2.matchTemplate 会释放 GIL，多个模板（或一张大图切成几条）可以在线程池里同时算。
+# AXIE_WORKERS=1 关闭；默认用 min(4, CPU 核数) 个线程。
+WORKERS = int(os.environ.get('AXIE_WORKERS', min(4, os.cpu_count() or 1)))
+TILE_MIN_PIXELS = 1_000_000   # 单个模板匹配时，图大于这么多像素才切条并行
+# 切条算出来的分数和整张图算的有 1e-5 量级的差别，正好卡在阈值上时结果会不一样，所以默认关闭；AXIE_TILE=1 打开
+TILE = os.environ.get('AXIE_TILE', '0') == '1'
+
+_executor = None
+_worker_local = threading.local()
+
+
+def set_workers(workers):
+    """修改线程池大小（基准测试对比用），返回原来的值"""
+    global WORKERS, _executor
+    previous = WORKERS
+    if workers != WORKERS and _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    WORKERS = workers
+    return previous
+
+
+def _in_worker():
+    return getattr(_worker_local, 'active', False)
+
+
+def _run_in_worker(fn, item, task):
+    _worker_local.active = True
+    metrics.task = task  # 线程池里的找图记录也算在调用方当前的步骤上
+    try:
+        return fn(item)
+    finally:
+        _worker_local.active = False
+        metrics.task = None
+
+
+def parallel_map(fn, items):
+    """和 [fn(x) for x in items] 结果、顺序完全一样；能并行时丢到线程池里算"""
+    global _executor
+    items = list(items)
+    if WORKERS <= 1 or len(items) <= 1 or _in_worker():
+        return [fn(item) for item in items]
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='match')
+    futures = [_executor.submit(_run_in_worker, fn, item, metrics.task) for item in items]
+    return [future.result() for future in futures]
+
+
+def _match(view, template, mask=None):
+    if mask is None:
+        return cv2.matchTemplate(view, template, cv2.TM_CCOEFF_NORMED)
+    result = cv2.matchTemplate(view, template, cv2.TM_CCOEFF_NORMED, mask=mask)
+    # 带遮罩时遇到纯色区域分母为 0，会算出 inf / nan
+    return np.nan_to_num(result, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def match_template(view, template, mask=None):
+    """cv2.matchTemplate(TM_CCOEFF_NORMED)，有遮罩时只比对遮罩内的像素；
+    TILE 打开且图很大时按行切成几条（相邻条重叠模板高度）并行算再拼回去"""
+    rows = view.shape[0] - template.shape[0] + 1
+    if (not TILE or WORKERS <= 1 or _in_worker() or view.shape[0] * view.shape[1] < TILE_MIN_PIXELS
+            or rows < WORKERS * 2):
+        return _match(view, template, mask)
+    th = template.shape[0]
+    bounds = np.linspace(0, rows, WORKERS + 1).astype(int)
+    strips = [(bounds[i], bounds[i + 1]) for i in range(WORKERS) if bounds[i + 1] > bounds[i]]
+    parts = parallel_map(lambda b: _match(view[b[0]:b[1] + th - 1], template, mask), strips)
+    return np.vstack(parts)
+
+
+def color_diff(match_area, mask=None):
+    """匹配区域三通道两两差的均值，越小越灰（和 image() 原来的算法保持一致）；有遮罩时只算遮罩内"""
+    diff_rg = np.abs(match_area[:, :, 2] - match_area[:, :, 1])
+    diff_rb = np.abs(match_area[:, :, 2] - match_area[:, :, 0])
+    diff_gb = np.abs(match_area[:, :, 1] - match_area[:, :, 0])
+    diff = (diff_rg + diff_rb + diff_gb) / 3.0
+    if mask is not None:
+        return np.mean(diff[mask > 0])
+    return np.mean(diff)
+
+
+def peaks(result, threshold, min_dx=1, min_dy=1, max_hits=None):
+    """得分图里 >= threshold 的局部最大值，返回 (xs, ys, scores)，按分数从高到低
+
+    用膨胀后比较找局部最大，窗口和去重距离一样大，所以不管多少像素过阈值，
+    留下来的峰值个数都被屏幕面积 / 窗口面积限住。
+    """
+    kernel = np.ones((2 * min_dy - 1, 2 * min_dx - 1), np.uint8)
+    local_max = cv2.dilate(result, kernel)
+    ys, xs = np.nonzero((result >= threshold) & (result >= local_max))
+    scores = result[ys, xs]
+    order = np.argsort(-scores, kind='stable')
+    if max_hits:
+        order = order[:max_hits]
+    return xs[order], ys[order], scores[order]
+
+
+def _in_grid(grid, gx, gy, x, y, min_dx, min_dy):
+    for nx in (gx - 1, gx, gx + 1):
+        for ny in (gy - 1, gy, gy + 1):
+            for px, py in grid.get((nx, ny), ()):
+                if abs(x - px) < min_dx and abs(y - py) < min_dy:
+                    return True
+    return False
+
+
+def suppress(xs, ys, scores, min_dx, min_dy, excluded_points=None):
+    """非极大值抑制：按分数从高到低保留，x、y 距离都小于阈值的算重复，返回保留的下标
+
+    excluded_points 附近的点先整体用 numpy 过滤掉，剩下的点用网格哈希，
+    每个点只和相邻 9 个格子里已保留的点比较。
+    """
+    xs = np.asarray(xs)
+    ys = np.asarray(ys)
+    idx = np.arange(len(xs))
+    if excluded_points is not None and len(excluded_points) and len(xs):
+        ex = np.asarray([p[:2] for p in excluded_points])
+        near = (np.abs(xs[:, None] - ex[:, 0]) < min_dx) & (np.abs(ys[:, None] - ex[:, 1]) < min_dy)
+        idx = idx[~near.any(axis=1)]
+    idx = idx[np.argsort(-np.asarray(scores)[idx], kind='stable')]
+
+    grid = {}
+    kept = []
+    for i in idx:
+        x, y = int(xs[i]), int(ys[i])
+        gx, gy = x // min_dx, y // min_dy
+        if _in_grid(grid, gx, gy, x, y, min_dx, min_dy):
+            continue
+        kept.append(i)
+        grid.setdefault((gx, gy), []).append((x, y))
+    return kept
+
+
+def pyramid_scale(entry, pyramid=None):
+    """pyramid=None 按 PYRAMID 表决定；False/0 关闭；数字直接当缩放比例"""
+    if pyramid is None:
+        pyramid = PYRAMID.get(entry.name)
+    if not pyramid:
+        return None
+    if min(entry.w, entry.h) * pyramid < PYRAMID_MIN_SIDE:
+        return None
+    return pyramid
+
+
+def _refine(view, template, coarse_xs, coarse_ys, scale, mask=None):
+    """粗匹配的候选点映射回原图，在附近小区域里重新打分，返回 [(x, y, score)]"""
+    th, tw = template.shape[:2]
+    pad = int(round(1 / scale)) + 2
+    refined = []
+    for cx, cy in zip(coarse_xs, coarse_ys):
+        rx1 = max(0, int(cx / scale) - pad)
+        ry1 = max(0, int(cy / scale) - pad)
+        rx2 = min(view.shape[1], int(cx / scale) + pad + tw)
+        ry2 = min(view.shape[0], int(cy / scale) + pad + th)
+        if rx2 - rx1 < tw or ry2 - ry1 < th:
+            continue
+        result = _match(view[ry1:ry2, rx1:rx2], template, mask)
+        _, max_val, _, (mx, my) = cv2.minMaxLoc(result)
+        refined.append((rx1 + mx, ry1 + my, max_val))
+    return refined
+
+
+def score_map_peaks(frame, entry, threshold, color=False, min_dx=1, min_dy=1, max_hits=None, pyramid=None):
+    """模板在 frame 上所有 >= threshold 的峰值 (xs, ys, scores)，左上角坐标，按分数从高到低"""
+    view = frame.view(color)
+    template = entry.view(color)
+    scale = pyramid_scale(entry, pyramid)
+    if scale is None:
+        with metrics.timer('match_ms'):
+            result = match_template(view, template, entry.mask_view(color))
+            return peaks(result, threshold, min_dx, min_dy, max_hits)
+
+    with metrics.timer('match_ms'):
+        return _pyramid_peaks(frame, entry, view, template, scale, threshold, color, min_dx, min_dy, max_hits)
+
+
+def _pyramid_peaks(frame, entry, view, template, scale, threshold, color, min_dx, min_dy, max_hits):
+    coarse = _match(frame.scaled(scale, color), entry.scaled(scale, color), entry.mask_view(color, scale))
+    coarse_dx = max(1, int(min_dx * scale))
+    coarse_dy = max(1, int(min_dy * scale))
+    cxs, cys, _ = peaks(coarse, threshold - PYRAMID_MARGIN, coarse_dx, coarse_dy,
+                        max(max_hits, PYRAMID_CANDIDATES) if max_hits else None)
+    refined = [p for p in _refine(view, template, cxs, cys, scale, entry.mask_view(color)) if p[2] >= threshold]
+    refined.sort(key=lambda p: p[2], reverse=True)
+    if max_hits:
+        refined = refined[:max_hits]
+    xs = np.array([p[0] for p in refined], dtype=np.intp)
+    ys = np.array([p[1] for p in refined], dtype=np.intp)
+    scores = np.array([p[2] for p in refined], dtype=np.float32)
+    return xs, ys, scores
+
+
+def best_match(frame, entry, color=True, pyramid=None):
+    """和 cv2.minMaxLoc 一样返回 (max_val, max_loc)，金字塔模式下只复核粗匹配的前几个候选"""
+    view = frame.view(color)
+    with metrics.timer('match_ms'):
+        return _best_match(frame, entry, view, color, pyramid)
+
+
+def _best_match(frame, entry, view, color, pyramid):
+    template = entry.view(color)
+    scale = pyramid_scale(entry, pyramid)
+    if scale is not None:
+        coarse = _match(frame.scaled(scale, color), entry.scaled(scale, color), entry.mask_view(color, scale))
+        cxs, cys, _ = peaks(coarse, -1, max(1, int(entry.w * scale) // 2), max(1, int(entry.h * scale) // 2),
+                            PYRAMID_CANDIDATES)
+        refined = _refine(view, template, cxs, cys, scale, entry.mask_view(color))
+        if refined:
+            x, y, max_val = max(refined, key=lambda p: p[2])
+            return max_val, (x, y)
+    result = match_template(view, template, entry.mask_view(color))
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return max_val, max_loc
+
+
+def _locate_in(frame, entry, threshold, color, gray_diff_threshold, pyramid):
+    """在 frame 里找 entry，返回 (x1, y1, x2, y2, score) 屏幕坐标，找不到返回 None"""
+    fw, fh = frame.size
+    if fw < entry.w or fh < entry.h:
+        return None
+    max_val, max_loc = best_match(frame, entry, color, pyramid)
+    record = metrics.current()
+    if record is not None and (record['score'] is None or max_val > record['score']):
+        record['score'] = float(max_val)
+    if max_val < threshold:
+        # print(f"[MISS] 没有找到 {entry.name}")
+        return None
+
+    if color:
+        match_area = frame.bgr[
+            max_loc[1]:max_loc[1] + entry.h,
+            max_loc[0]:max_loc[0] + entry.w
+        ]
+        mean_diff = color_diff(match_area, entry.mask)
+        if mean_diff < gray_diff_threshold:
+            metrics.incr('gray_rejects')
+            print(f"[FAIL] {entry.name}.png 匹配区域颜色太灰（均差≈{mean_diff:.2f}, 未识别出图片")
+            return None
+
+    # 返回原来整张模板的框（有遮罩裁过边时比实际比对的区域大），中心和没加遮罩时一样
+    x1, y1 = frame.offset
+    left, top = max_loc[0] + x1 - entry.crop[0], max_loc[1] + y1 - entry.crop[1]
+    return (left, top, left + entry.full_w, top + entry.full_h, max_val)
+
+
+def locate(entry, threshold=0.8, region=None, color=True, gray_diff_threshold=15, frame=None, pyramid=None,
+           use_hint=True):
+    """image() 的找图部分：返回命中框 (x1, y1, x2, y2, score)，找不到返回 None
+
+    没指定 region 时先在 hints 记录的上次位置附近找，没找到再全屏找。
+    """
+    with metrics.call('image', entry.name):
+        found = _locate(entry, threshold, region, color, gray_diff_threshold, frame, pyramid, use_hint)
+        metrics.set(hit=found is not None)
+        return found
+
+
+def _locate(entry, threshold, region, color, gray_diff_threshold, frame, pyramid, use_hint):
+    if use_hint and region is None:
+        roi = hints.roi(entry.name)
+        if roi is not None:
+            roi_frame = grab(roi, frame)
+            metrics.set(region=roi_frame.size, roi=True)
+            found = _locate_in(roi_frame, entry, threshold, color, gray_diff_threshold, pyramid)
+            hints.record(entry.name, found and found[:4], via_roi=True)
+            if found is not None:
+                return found
+
+    full_frame = grab(region, frame)
+    metrics.set(region=full_frame.size, roi=False)
+    found = _locate_in(full_frame, entry, threshold, color, gray_diff_threshold, pyramid)
+    hints.record(entry.name, found and found[:4], via_roi=False)
+    return found
+
+
+def _prepare(frame, templates, pyramid, color=False):
+    """并行前先把要用的灰度图、缩小图算好，避免几个线程同时去算同一张"""
+    frame.view(color)
+    for entry in templates:
+        scale = pyramid_scale(entry, pyramid)
+        if scale is not None:
+            frame.scaled(scale, color)
+            entry.scaled(scale, color)
+
+
+def _family_peaks(frame, jobs, min_dx, min_dy, pyramid):
+    """jobs: [(entry, threshold)]，返回每个模板的峰值，顺序和 jobs 一致"""
+    _prepare(frame, [entry for entry, _ in jobs], pyramid)
+    if WORKERS > 1 and len(jobs) > 1 and not _in_worker():
+        # 子线程里的计时不会记到当前记录上，这里按总耗时记
+        with metrics.timer('match_ms'):
+            return parallel_map(lambda job: score_map_peaks(frame, job[0], job[1], False, min_dx, min_dy,
+                                                            pyramid=pyramid), jobs)
+    return [score_map_peaks(frame, entry, threshold, False, min_dx, min_dy, pyramid=pyramid)
+            for entry, threshold in jobs]
+
+
+def _merge_family(frame, templates, family_peaks, min_dx, min_dy, excluded_points):
+    x1, y1 = frame.offset
+    xs, ys, scores, owners = [], [], [], []
+    for entry, (px, py, ps) in zip(templates, family_peaks):
+        xs.append(px + entry.anchor[0] + x1)
+        ys.append(py + entry.anchor[1] + y1)
+        scores.append(ps)
+        owners.extend([entry] * len(ps))
+    if not owners:
+        return []
+    xs, ys, scores = np.concatenate(xs), np.concatenate(ys), np.concatenate(scores)
+    keep = suppress(xs, ys, scores, min_dx, min_dy, excluded_points)
+    return [(int(xs[i]), int(ys[i]), float(scores[i]), owners[i]) for i in keep]
+
+
+def match_family(frame, templates, threshold, min_dx=40, min_dy=40, excluded_points=None, pyramid=None):
+    """一组模板（如 tree4_1..tree4_5）在灰度图上的全部命中，[(cx, cy, score, template)]，按分数从高到低"""
+    family_peaks = _family_peaks(frame, [(entry, threshold) for entry in templates], min_dx, min_dy, pyramid)
+    return _merge_family(frame, templates, family_peaks, min_dx, min_dy, excluded_points)
+
+
+def match_families(png_list, thresholds, region=None, frame=None, min_dx=40, min_dy=40, excluded_points=None,
+                   pyramid=None):
+    """image_multi() 的找图部分：返回 ({组名: [(cx, cy, score)]}, 全局第一个命中 (cx, cy, score, template) 或 None)
+
+    png_list 按顺序查，"第一个命中"是第一个有结果的组里分数最高的点。
+    """
+    with metrics.call('image_multi', ','.join(png_list)):
+        frame = grab(region, frame)
+        metrics.set(region=frame.size)
+        results = {}
+        families = []
+        for picture in png_list:
+            templates = registry.family(picture)
+            if not templates:
+                print(f"[ERROR] 未找到任何多模板图片：{picture}_*.png")
+                results[picture] = []
+                continue
+
+            threshold = thresholds.get(picture)
+            if threshold is None:
+                print(f"[WARN] 图片 {picture} 没有设置阈值，跳过该角色")
+                continue
+            families.append((picture, templates, threshold))
+
+        # 所有组的所有模板一起丢进线程池，再按组合并，结果和逐个算一样
+        jobs = [(entry, threshold) for _, templates, threshold in families for entry in templates]
+        all_peaks = iter(_family_peaks(frame, jobs, min_dx, min_dy, pyramid))
+        first = None
+        for picture, templates, threshold in families:
+            family_peaks = [next(all_peaks) for _ in templates]
+            hits = _merge_family(frame, templates, family_peaks, min_dx, min_dy, excluded_points)
+            results[picture] = [(cx, cy, score) for cx, cy, score, _ in hits]
+            # for cx, cy, score, entry in hits:
+            #     print(f"[DEBUG] 找到匹配点: ({cx}, {cy}), 匹配度: {score:.3f}, 图片: {entry.path}")
+            if first is None and hits:
+                first = hits[0]
+        metrics.set(hit=first is not None, score=first[2] if first else None)
+        return results, first
+
+
+def find_all(names, threshold=0.95, region=None, frame=None, color=True, gray_diff_threshold=15,
+             min_distance=100, excluded_points=None, max_hits=20, pyramid=None):
+    """一张截图里匹配所有模板，返回互不重叠的命中 [Hit]，按分数从高到低
+
+    两个命中的 x、y 距离都小于 min_distance 视为同一个目标，只保留分数高的；
+    excluded_points 附近的命中直接丢弃（例如已经点过的位置）。
+    彩色匹配时校准过的模板用校准的阈值，threshold 只是没校准过的模板的默认值。
+    """
+    with metrics.call('find_all', ','.join(names)):
+        hits = _find_all(names, threshold, grab(region, frame), color, gray_diff_threshold, min_distance,
+                         excluded_points, max_hits, pyramid)
+        metrics.set(hit=bool(hits), score=hits[0].score if hits else None)
+        return hits
+
+
+def _find_all(names, threshold, frame, color, gray_diff_threshold, min_distance, excluded_points, max_hits, pyramid):
+    metrics.set(region=frame.size)
+    x1, y1 = frame.offset
+    xs, ys, scores, names_hit = [], [], [], []
+    for name in names:
+        entry = registry.get(name)
+        if entry is None:
+            print(f"[ERROR] 图片不存在: {name}")
+            continue
+        name_threshold = registry.match_threshold(name, color, threshold)
+        px, py, ps = score_map_peaks(frame, entry, name_threshold, color, min_distance, min_distance,
+                                     max_hits, pyramid)
+        for x, y, score in zip(px, py, ps):
+            if color and gray_diff_threshold:
+                mean_diff = color_diff(frame.bgr[y:y + entry.h, x:x + entry.w], entry.mask)
+                if mean_diff < gray_diff_threshold:
+                    continue
+            xs.append(x + entry.anchor[0] + x1)
+            ys.append(y + entry.anchor[1] + y1)
+            scores.append(float(score))
+            names_hit.append(name)
+
+    keep = suppress(xs, ys, scores, min_distance, min_distance, excluded_points)
+    return [Hit(names_hit[i], int(xs[i]), int(ys[i]), scores[i]) for i in keep]
+
+
+def scan_points(name, points, radius=40, threshold=None, region=None, frame=None, color=True,
+                gray_diff_threshold=None):
+    """一张截图里一次性检查多个点附近（x、y 各 radius 像素内）有没有模板，返回每个点的 (score, hit)
+
+    threshold / gray_diff_threshold 不传时用校准过的值。
+
+    整张图只做一次 matchTemplate，再用膨胀把每个位置变成"附近最高分"，
+    所有点的分数一次 numpy 索引取出来；只有过了阈值的点才单独做灰度检查。
+    """
+    entry = registry.get(name)
+    if entry is None:
+        print(f"[ERROR] 图片不存在: {name}")
+        return [(None, False)] * len(points)
+    if threshold is None:
+        threshold = registry.match_threshold(name, color)
+    if gray_diff_threshold is None:
+        gray_diff_threshold = registry.gray_diff(name)
+
+    with metrics.call('scan_points', name):
+        frame = grab(region, frame)
+        metrics.set(region=frame.size)
+        x1, y1 = frame.offset
+        with metrics.timer('match_ms'):
+            result = match_template(frame.view(color), entry.view(color), entry.mask_view(color))
+            kernel = np.ones((2 * radius + 1, 2 * radius + 1), np.uint8)
+            nearby = cv2.dilate(result, kernel)
+
+        pts = np.asarray(points, dtype=np.intp).reshape(-1, 2)
+        xs = pts[:, 0] - x1 - entry.anchor[0]
+        ys = pts[:, 1] - y1 - entry.anchor[1]
+        inside = (xs >= -radius) & (ys >= -radius) & (xs < result.shape[1] + radius) & (ys < result.shape[0] + radius)
+        xs = np.clip(xs, 0, result.shape[1] - 1)
+        ys = np.clip(ys, 0, result.shape[0] - 1)
+        scores = np.where(inside, nearby[ys, xs], -1.0)
+
+        out = []
+        for x, y, score in zip(xs, ys, scores):
+            hit = bool(score >= threshold)
+            if hit and color and gray_diff_threshold:
+                # 找到窗口里最高分的位置再检查颜色
+                wx1, wy1 = max(0, x - radius), max(0, y - radius)
+                window = result[wy1:y + radius + 1, wx1:x + radius + 1]
+                my, mx = np.unravel_index(np.argmax(window), window.shape)
+                left, top = wx1 + mx, wy1 + my
+                if color_diff(frame.bgr[top:top + entry.h, left:left + entry.w], entry.mask) < gray_diff_threshold:
+                    metrics.incr('gray_rejects')
+                    hit = False
+            out.append((float(score), hit))
+        metrics.set(hit=any(hit for _, hit in out), score=float(scores.max()) if len(scores) else None)
+        return out
+
+
+def _time_best_match(frame, entry, pyramid, repeat):
+    best_match(frame, entry, True, pyramid)  # 预热：缩小图只算一次，不计入耗时
+    start = time.perf_counter()
+    for _ in range(repeat):
+        score, loc = best_match(frame, entry, True, pyramid)
+    return (time.perf_counter() - start) * 1000 / repeat, score, loc
+
+
+def compare_pyramid(frame, names=None, repeat=5):
+    """对比全分辨率和金字塔模式的耗时与结果，返回 [(name, full_ms, pyramid_ms, full_score, pyramid_score, same_loc)]"""
+    names = names or list(PYRAMID)
+    rows = []
+    for name in names:
+        entry = registry.get(name)
+        scale = PYRAMID.get(name, 0.5)
+        if entry is None or pyramid_scale(entry, scale) is None:
+            continue
+        full_ms, full_score, full_loc = _time_best_match(frame, entry, False, repeat)
+        pyr_ms, pyr_score, pyr_loc = _time_best_match(frame, entry, scale, repeat)
+        same_loc = abs(full_loc[0] - pyr_loc[0]) <= 1 and abs(full_loc[1] - pyr_loc[1]) <= 1
+        rows.append((name, full_ms, pyr_ms, full_score, pyr_score, same_loc))
+    return rows
+
+
+if __name__ == '__main__':
+    import sys
+    from frame import Frame
+
+    if len(sys.argv) < 2:
+        print("用法: python matching.py 截图.png [模板名 ...]")
+        sys.exit(1)
+    shot = cv2.imread(sys.argv[1], cv2.IMREAD_COLOR)
+    if shot is None:
+        print(f"[ERROR] 截图加载失败: {sys.argv[1]}")
+        sys.exit(1)
+    rows = compare_pyramid(Frame(bgr=shot), sys.argv[2:] or None)
+    print(f"{'模板':<20}{'全图ms':>10}{'金字塔ms':>10}{'加速':>8}{'全图分':>8}{'金字塔分':>10}  位置一致")
+    for name, full_ms, pyr_ms, full_score, pyr_score, same_loc in rows:
+        print(f"{name:<20}{full_ms:>10.2f}{pyr_ms:>10.2f}{full_ms / pyr_ms:>7.1f}x"
+              f"{full_score:>8.3f}{pyr_score:>10.3f}  {'是' if same_loc else '否'}")
+    if rows:
+        total_full = sum(row[1] for row in rows)
+        total_pyr = sum(row[2] for row in rows)
+        print(f"合计 {total_full:.1f}ms -> {total_pyr:.1f}ms，加速 {total_full / total_pyr:.1f}x")
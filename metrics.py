@@ -0,0 +1,172 @@
+"""找图耗时记录：image() / image_multi() / loading() 每次调用记一条，异步写到 metrics.jsonl
+
+    python metrics.py [metrics.jsonl]      按模板、按任务汇总
+
+每条记录：kind（image / image_multi / find_all / loading / screen）、name（模板）、task（当前步骤，如 collect）、
+region（宽x高）、capture_ms / convert_ms / match_ms / total_ms、score（最高分）、hit、gray_rejects。
+AXIE_METRICS=0 关闭。
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque, defaultdict
+from contextlib import contextmanager
+
+
+METRICS_FILE = 'metrics.jsonl'
+
+
+class Metrics:
+    def __init__(self, path=METRICS_FILE, capacity=10000, flush_interval=2.0):
+        self.path = path
+        self.enabled = os.environ.get('AXIE_METRICS', '1') != '0'
+        self.buffer = deque(maxlen=capacity)  # 写盘跟不上时丢最旧的，不阻塞找图
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def task(self):
+        """当前线程在跑的步骤；多窗口时每个 worker 线程各记各的"""
+        return getattr(self._local, 'task', None)
+
+    @task.setter
+    def task(self, name):
+        self._local.task = name
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def call(self, kind, name, region=None):
+        if not self.enabled:
+            yield None
+            return
+        record = {'ts': time.time(), 'kind': kind, 'name': name, 'task': self.task,
+                  'capture_ms': 0.0, 'convert_ms': 0.0, 'match_ms': 0.0, 'captures': 0,
+                  'gray_rejects': 0, 'score': None, 'hit': False}
+        if region is not None:
+            record['region'] = region
+        stack = self._stack()
+        stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['total_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            for key in ('capture_ms', 'convert_ms', 'match_ms'):
+                record[key] = round(record[key], 3)
+            stack.pop()
+            self.buffer.append(record)
+            self._ensure_writer()
+
+    def current(self):
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else None
+
+    def set(self, **fields):
+        record = self.current()
+        if record is not None:
+            record.update(fields)
+
+    def incr(self, field, amount=1):
+        record = self.current()
+        if record is not None:
+            record[field] = record.get(field, 0) + amount
+
+    @contextmanager
+    def timer(self, field):
+        """耗时累加到当前记录的 field 上（毫秒）；不在任何记录里时什么也不做"""
+        record = self.current()
+        if record is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record[field] += (time.perf_counter() - start) * 1000
+
+    def _ensure_writer(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, name='metrics-writer', daemon=True)
+            self._thread.start()
+
+    def _writer(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        with self._lock:
+            records = []
+            while self.buffer:
+                records.append(self.buffer.popleft())
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+metrics = Metrics()
+atexit.register(metrics.flush)
+
+
+def load(path=METRICS_FILE):
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    return records
+
+
+def summarize(records, key):
+    """按 key（'name' 或 'task'）汇总，返回按总耗时从高到低的行"""
+    groups = defaultdict(list)
+    for record in records:
+        if record['kind'] in ('loading', 'screen'):
+            continue  # loading / screen 里的每次 image() 已经单独记过，避免重复计时
+        groups[record.get(key) or '-'].append(record)
+    rows = []
+    for group, items in groups.items():
+        total = sum(r['total_ms'] for r in items)
+        rows.append({
+            key: group,
+            'calls': len(items),
+            'total_ms': total,
+            'mean_ms': total / len(items),
+            'capture_ms': sum(r['capture_ms'] for r in items),
+            'convert_ms': sum(r['convert_ms'] for r in items),
+            'match_ms': sum(r['match_ms'] for r in items),
+            'captures': sum(r['captures'] for r in items),
+            'hit_rate': sum(1 for r in items if r['hit']) / len(items),
+            'gray_rejects': sum(r['gray_rejects'] for r in items),
+        })
+    rows.sort(key=lambda row: row['total_ms'], reverse=True)
+    return rows
+
+
+def print_summary(rows, key, title):
+    print(f"\n== 按{title}汇总 ==")
+    print(f"{title:<20}{'次数':>6}{'总ms':>10}{'均ms':>8}{'截图ms':>10}{'转换ms':>9}{'匹配ms':>10}"
+          f"{'截图数':>7}{'命中率':>7}{'太灰':>6}")
+    for row in rows:
+        print(f"{str(row[key]):<20}{row['calls']:>6}{row['total_ms']:>10.0f}{row['mean_ms']:>8.1f}"
+              f"{row['capture_ms']:>10.0f}{row['convert_ms']:>9.0f}{row['match_ms']:>10.0f}"
+              f"{row['captures']:>7}{row['hit_rate']:>7.0%}{row['gray_rejects']:>6}")
+
+
+if __name__ == '__main__':
+    records = load(sys.argv[1] if len(sys.argv) > 1 else METRICS_FILE)
+    print(f"共 {len(records)} 条记录")
+    print_summary(summarize(records, 'name'), 'name', '模板')
+    print_summary(summarize(records, 'task'), 'task', '任务')
@@ -0,0 +1,89 @@
+"""采集循环的流水线：点当前目标、等它的动画时，后台线程已经在匹配下一个目标
+
+    clicked = pipeline.run(route, check, act)
+
+- route 里每个点前两项是屏幕坐标 (x, y, ...)，第一个点一般刚全屏找过，first_checked=True 时不再确认。
+- check(point, frame) 在 frame（point 附近一小块截图）里确认目标，返回新坐标或 None，在后台线程里跑。
+- act(x, y) 是点击、按键这些输入，在当前线程跑（输入端、窗口区域都是按线程记的）。
+- 截图都在当前线程：点当前目标之前先截下一个目标那一小块，交给后台匹配；
+  点完再截同一小块比一下，变了（比如上一棵树倒下时挡到了这里）就丢掉后台结果，用新截的图当场重新确认。
+  后台线程只做匹配，截图后端和录制回放看到的截图顺序和不用流水线时一样。
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from frame import Frame, screen_region, window_region
+from inputs import gui
+from metrics import metrics
+from waits import changed, signature
+
+
+RADIUS = 60  # 确认目标时只截目标周围这么大的一块
+
+_executor = ThreadPoolExecutor(thread_name_prefix='pipeline')
+
+
+def around(point, radius=RADIUS):
+    """point 周围 radius 像素、裁到当前窗口以内的区域"""
+    x, y = point[0], point[1]
+    sx1, sy1, sx2, sy2 = screen_region()
+    return max(sx1, x - radius), max(sy1, y - radius), min(sx2, x + radius), min(sy2, y + radius)
+
+
+def _capture(point, radius):
+    """截 point 附近一小块；截图后端会复用缓冲区，交给后台线程前拷一份"""
+    frame = Frame.capture(around(point, radius))
+    return Frame(bgr=frame.bgr.copy(), region=frame.region)
+
+
+def _check(window, task, check, point, frame):
+    """后台线程：只做匹配"""
+    metrics.task = task
+    with window_region(window):
+        return check(point, frame)
+
+
+async def _run(route, check, act, radius, limit, first_checked, on_miss):
+    loop = asyncio.get_running_loop()
+    window = screen_region()  # 后台线程没有 worker 的窗口设置，要传过去
+    done = []
+    pending = seen = None
+    try:
+        for i, point in enumerate(route):
+            if limit is not None and len(done) >= limit:
+                break
+            if pending is not None:
+                pos = await pending
+                fresh = _capture(point, radius)
+                if changed(seen, signature(frame=fresh)):
+                    pos = check(point, fresh)  # 后台那张图截了之后这块变了，用新图重新确认
+            elif i == 0 and first_checked:
+                pos = (point[0], point[1])
+            else:
+                pos = check(point, _capture(point, radius))
+
+            # 下一个目标先在这里截好，匹配在后台跑，和这个目标的输入、动画同时进行
+            pending = None
+            if i + 1 < len(route):
+                frame = _capture(route[i + 1], radius)
+                seen = signature(frame=frame)
+                pending = loop.run_in_executor(_executor, _check, window, metrics.task, check, route[i + 1], frame)
+
+            if pos is None:
+                if on_miss is not None:
+                    on_miss(point)
+                continue
+            with gui.exclusive():  # 一个目标的整串点击、按键不让别的窗口插进来
+                act(*pos)
+            done.append(pos)
+    finally:
+        if pending is not None:
+            pending.cancel()
+    return done
+
+
+def run(route, check, act, radius=RADIUS, limit=None, first_checked=False, on_miss=None):
+    """按顺序对 route 里确认过的点执行 act，最多 limit 个，返回实际执行过的坐标"""
+    if not route:
+        return []
+    return asyncio.run(_run(route, check, act, radius, limit, first_checked, on_miss))
@@ -0,0 +1,275 @@
+"""录制一轮真实运行的截图和输入，之后在没有游戏、没有显示器的机器上回放
+
+    python record.py record session.zip [--module axie_land] [--cycles 1]
+    python record.py replay session.zip [--module axie_land] [--json report.json]
+
+存档是一个 zip：meta.json（屏幕尺寸、录制时的 hints）、events.jsonl（截图/输入/步骤，带时间戳）、
+frames/<hash>.png（去重后的截图，相同画面只存一张）。
+"""
+import argparse
+import copy
+import hashlib
+import importlib
+import json
+import time
+import zipfile
+
+import cv2
+import numpy as np
+
+from capture import get_backend, use_backend
+from hints import hints
+from inputs import INPUT_OPS, FakeSink, get_sink, use_sink
+
+
+def _plain(values):
+    """numpy 整数等转成普通 Python 值，方便写 json 和比较"""
+    return [value.item() if hasattr(value, 'item') else value for value in values]
+
+
+class Recorder:
+    def __init__(self, path, screen, module_name):
+        self.zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        self.meta = {'screen': list(screen), 'module': module_name, 'created': time.time(),
+                     'hints': copy.deepcopy(hints.entries)}
+        self.events = []
+        self.seen = set()
+        self.t0 = time.perf_counter()
+
+    def _event(self, kind, **fields):
+        self.events.append({'t': round(time.perf_counter() - self.t0, 4), 'type': kind, **fields})
+
+    def frame(self, pixels, order, region):
+        bgr = pixels if order == 'bgr' else cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+        bgr = np.ascontiguousarray(bgr)
+        digest = hashlib.blake2b(bgr.tobytes(), digest_size=16)
+        digest.update(str(bgr.shape).encode())
+        frame_id = digest.hexdigest()
+        if frame_id not in self.seen:
+            ok, png = cv2.imencode('.png', bgr)
+            if ok:
+                # png 本身已经压缩过，不再 deflate
+                self.zip.writestr(f'frames/{frame_id}.png', png.tobytes(), zipfile.ZIP_STORED)
+                self.seen.add(frame_id)
+        self._event('frame', id=frame_id, region=list(region))
+
+    def input(self, op, args, kwargs):
+        self._event('input', op=op, args=_plain(args), kwargs=dict(zip(kwargs, _plain(kwargs.values()))))
+
+    def step(self, name, args):
+        self._event('step', name=name, args=list(args))
+
+    def cycle(self):
+        self._event('cycle')
+
+    def close(self):
+        lines = '\n'.join(json.dumps(event, ensure_ascii=False) for event in self.events)
+        self.zip.writestr('events.jsonl', lines)
+        self.zip.writestr('meta.json', json.dumps(self.meta, ensure_ascii=False))
+        self.zip.close()
+        print(f"[INFO] 录制结束：{len(self.events)} 个事件，{len(self.seen)} 张不同的截图")
+
+
+class RecordingBackend:
+    def __init__(self, inner, recorder):
+        self.inner = inner
+        self.recorder = recorder
+
+    def size(self):
+        return self.inner.size()
+
+    def grab(self, region):
+        pixels, order = self.inner.grab(region)
+        self.recorder.frame(pixels, order, region)
+        return pixels, order
+
+
+class RecordingSink:
+    def __init__(self, inner, recorder):
+        self.inner = inner
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        attr = getattr(self.inner, name)
+        if name not in INPUT_OPS:
+            return attr
+
+        def recorded(*args, **kwargs):
+            self.recorder.input(name, args, kwargs)
+            return attr(*args, **kwargs)
+        return recorded
+
+
+class Session:
+    """读取存档；截图按两次输入之间分段，回放时第 k 次输入之后就从第 k 段取截图"""
+
+    def __init__(self, path):
+        self.zip = zipfile.ZipFile(path)
+        self.meta = json.loads(self.zip.read('meta.json'))
+        self.events = [json.loads(line) for line in self.zip.read('events.jsonl').decode().splitlines() if line]
+        self._frames = {}
+
+        self.segments = [[]]
+        for event in self.events:
+            if event['type'] == 'frame':
+                self.segments[-1].append(event)
+            elif event['type'] == 'input':
+                self.segments.append([])
+
+    def image(self, frame_id):
+        if frame_id not in self._frames:
+            data = np.frombuffer(self.zip.read(f'frames/{frame_id}.png'), np.uint8)
+            self._frames[frame_id] = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        return self._frames[frame_id]
+
+    def steps(self):
+        """[(cycle, name, [输入])]，按录制顺序"""
+        steps = []
+        cycle = 0
+        for event in self.events:
+            if event['type'] == 'cycle':
+                cycle += 1
+            elif event['type'] == 'step':
+                steps.append((cycle, event['name'], []))
+            elif event['type'] == 'input' and steps:
+                steps[-1][2].append((event['op'], event['args'], event.get('kwargs', {})))
+        return steps
+
+    @property
+    def cycles(self):
+        return max(1, sum(1 for event in self.events if event['type'] == 'cycle'))
+
+
+def _contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+class ReplayBackend:
+    def __init__(self, session):
+        self.session = session
+        self.segment = 0
+        self.pos = 0
+        self.captures = 0
+
+    def size(self):
+        return tuple(self.session.meta['screen'])
+
+    def on_input(self, op, args):
+        self.segment = min(self.segment + 1, len(self.session.segments) - 1)
+        self.pos = 0
+
+    def _pick(self, region):
+        """优先按录制顺序取本段下一张；区域对不上就找之前最近一张能覆盖这个区域的截图"""
+        frames = self.session.segments[self.segment]
+        if self.pos < len(frames) and _contains(frames[self.pos]['region'], region):
+            event = frames[self.pos]
+            self.pos += 1
+            return event
+        earlier = [frames[:self.pos]] + [self.session.segments[i] for i in range(self.segment - 1, -1, -1)]
+        for segment in earlier + [frames[self.pos:]]:
+            for event in reversed(segment):
+                if _contains(event['region'], region):
+                    return event
+        return None
+
+    def grab(self, region):
+        self.captures += 1
+        x1, y1, x2, y2 = region
+        event = self._pick(region)
+        if event is None:
+            return np.zeros((y2 - y1, x2 - x1, 3), np.uint8), 'bgr'
+        rx1, ry1 = event['region'][:2]
+        img = self.session.image(event['id'])
+        return img[y1 - ry1:y2 - ry1, x1 - rx1:x2 - rx1], 'bgr'
+
+
+def record(path, module_name='axie_land', cycles=1):
+    backend = get_backend()
+    recorder = Recorder(path, backend.size(), module_name)
+    use_backend(RecordingBackend(backend, recorder))
+    use_sink(RecordingSink(get_sink(), recorder))
+    module = importlib.import_module(module_name)
+    try:
+        for _ in range(cycles):
+            recorder.cycle()
+            module.run_cycle(on_step=recorder.step)
+    finally:
+        recorder.close()
+
+
+def replay(path, module_name=None):
+    """回放存档，返回每一步的耗时、截图次数，以及输入和录制时是否一致"""
+    session = Session(path)
+    backend = ReplayBackend(session)
+    sink = FakeSink(on_input=backend.on_input)
+    use_backend(backend)
+    use_sink(sink)
+    hints.entries = copy.deepcopy(session.meta.get('hints', {}))
+    hints.path = None
+
+    module = importlib.import_module(module_name or session.meta['module'])
+    recorded = session.steps()
+    report = []
+    current = {}
+
+    def finish():
+        if not current:
+            return
+        inputs = [(op, _plain(args), dict(zip(kwargs, _plain(kwargs.values()))))
+                  for _, op, args, kwargs in sink.log[current['log_start']:]]
+        expected = recorded[len(report)][2] if len(report) < len(recorded) else []
+        diverged = next((i for i, (a, b) in enumerate(zip(inputs, expected)) if a != b), None)
+        if diverged is None and len(inputs) != len(expected):
+            diverged = min(len(inputs), len(expected))
+        report.append({
+            'step': current['name'],
+            'args': current['args'],
+            'seconds': round(time.perf_counter() - current['start'], 4),
+            'captures': backend.captures - current['captures'],
+            'inputs': len(inputs),
+            'recorded_inputs': len(expected),
+            'diverged_at': diverged,
+        })
+
+    def on_step(name, args):
+        finish()
+        current.update(name=name, args=list(args), start=time.perf_counter(),
+                       captures=backend.captures, log_start=len(sink.log))
+
+    for _ in range(session.cycles):
+        module.run_cycle(on_step=on_step)
+        finish()
+        current.clear()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录制 / 回放一轮收菜")
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record')
+    rec.add_argument('archive')
+    rec.add_argument('--module', default='axie_land')
+    rec.add_argument('--cycles', type=int, default=1)
+    rep = sub.add_parser('replay')
+    rep.add_argument('archive')
+    rep.add_argument('--module', default=None)
+    rep.add_argument('--json', default=None, help="把结果写成 json")
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record(args.archive, args.module, args.cycles)
+        return
+
+    report = replay(args.archive, args.module)
+    print(f"{'步骤':<16}{'耗时s':>8}{'截图':>6}{'输入':>6}{'录制输入':>8}  一致")
+    for row in report:
+        same = '是' if row['diverged_at'] is None else f"否(第{row['diverged_at']}个)"
+        print(f"{row['step']:<16}{row['seconds']:>8.3f}{row['captures']:>6}{row['inputs']:>6}"
+              f"{row['recorded_inputs']:>8}  {same}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+
+
+if __name__ == '__main__':
+    main()
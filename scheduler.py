@@ -0,0 +1,178 @@
+"""按冷却时间调度任务，代替 "全部跑一遍 + 倒计时 5400 秒" 的主循环
+
+每个任务属于一块地（plot），有自己的冷却时间（作物/树石刷新、厨房和锤子屋的制作时间、矿刷新）。
+到点的任务按地分组，同一块地上的任务一次切过去做完；下一个任务还要很久才到点就关游戏，
+到点了再进。每个任务上次运行的时间写在 schedule.json，重启后接着算。
+
+任务函数返回一个数字时，把它当作这次实际的冷却秒数（比如制作队列没排满，早点回来补）。
+"""
+import atexit
+import json
+import os
+import sys
+from collections import namedtuple
+
+from inputs import gui
+from metrics import metrics
+
+
+SCHEDULE_FILE = 'schedule.json'
+
+Job = namedtuple('Job', ['plot', 'func', 'args', 'cooldown'])
+
+
+def job_key(job):
+    args = ','.join(str(arg) for arg in job.args)
+    return f"{job.plot}/{job.func.__name__}({args})"
+
+
+class Scheduler:
+    """jobs 的顺序就是同一块地上任务的执行顺序（比如先 discard 再 mine）
+
+    enter / leave / switch 是进游戏、关游戏、切地的函数（leave 为 None 时不关游戏）；
+    batch_window 秒内就会到点的任务顺便一起做，省一次切地；
+    下一个任务超过 keep_open 秒才到点就先关游戏。
+    runner(func, args) 用来真正执行一个步骤，默认直接 func(*args)。
+    """
+
+    def __init__(self, jobs, enter, leave, switch, path=SCHEDULE_FILE, batch_window=300, keep_open=600,
+                 runner=None, retry_delay=60):
+        self.jobs = list(jobs)
+        self.enter = enter
+        self.leave = leave
+        self.switch = switch
+        self.path = path
+        self.batch_window = batch_window
+        self.keep_open = keep_open
+        self.runner = runner or (lambda func, args: func(*args))
+        self.retry_delay = retry_delay
+        self.last_run = {}
+        self.next_due = {}
+        self.in_game = False
+        self.load()
+
+    def load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.last_run = data.get('last_run', {})
+            self.next_due = data.get('next_due', {})
+        except (OSError, ValueError) as e:
+            print(f"[WARN] 读取 {self.path} 失败，所有任务当作已到点: {e}")
+
+    def save(self):
+        if self.path is None:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_run': self.last_run, 'next_due': self.next_due}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def due_at(self, job):
+        """任务下次到点的时间；没跑过的任务马上到点"""
+        return self.next_due.get(job_key(job), 0)
+
+    def due(self, now, window=0):
+        return [job for job in self.jobs if self.due_at(job) <= now + window]
+
+    def plan(self, now):
+        """[(plot, [job])]：有任务到点的地按最早到点排序，每块地带上 batch_window 内也会到点的任务"""
+        ready = self.due(now)
+        if not ready:
+            return []
+        plots = []
+        for job in sorted(ready, key=self.due_at):
+            if job.plot not in plots:
+                plots.append(job.plot)
+        batch = self.due(now, self.batch_window)
+        return [(plot, [job for job in batch if job.plot == plot]) for plot in plots]
+
+    def run_job(self, job, on_step=None):
+        name = job.func.__name__
+        metrics.task = name
+        if on_step is not None:
+            on_step(name, job.args)
+        try:
+            result = self.runner(job.func, job.args)
+        finally:
+            metrics.task = None
+        now = gui.now()
+        cooldown = result if isinstance(result, (int, float)) and not isinstance(result, bool) else job.cooldown
+        key = job_key(job)
+        self.last_run[key] = now
+        self.next_due[key] = now + cooldown
+
+    def _step(self, func, args, on_step):
+        metrics.task = func.__name__
+        if on_step is not None:
+            on_step(func.__name__, args)
+        try:
+            return self.runner(func, args)
+        finally:
+            metrics.task = None
+
+    def tick(self, on_step=None):
+        """把现在到点的任务做完，返回做了几个"""
+        batches = self.plan(gui.now())
+        if not batches:
+            return 0
+        # 每次都确认一下还在游戏里（已经在游戏里时 enter 只截一张图判断画面）：
+        # 不关游戏的配置里，掉线、维护之后也要能重新进去
+        if self._step(self.enter, (), on_step) is False:
+            self.in_game = False
+            print(f"[FAIL] 进不了游戏，{self.retry_delay} 秒后再试")
+            gui.sleep(self.retry_delay)
+            return 0
+        self.in_game = True
+        done = 0
+        for plot, jobs in batches:
+            if plot is not None:
+                self._step(self.switch, (plot,), on_step)
+            for job in jobs:
+                self.run_job(job, on_step)
+                done += 1
+            self.save()
+        return done
+
+    def idle(self, on_step=None):
+        """没有任务到点：离下一个任务还久就关游戏，然后等到它到点"""
+        wait = max(0, min(self.due_at(job) for job in self.jobs) - gui.now())
+        if self.in_game and self.leave is not None and wait > self.keep_open:
+            self._step(self.leave, (), on_step)
+            self.in_game = False
+        if wait > 0:
+            countdown(wait)
+
+    def run_forever(self, on_step=None):
+        if not self.jobs:
+            print("[ERROR] 没有任务")
+            return
+        atexit.register(self.save)
+        while True:
+            self.tick(on_step)
+            self.idle(on_step)
+
+    def summary(self):
+        now = gui.now()
+        for job in sorted(self.jobs, key=self.due_at):
+            left = self.due_at(job) - now
+            print(f"{job_key(job):<40}{'已到点' if left <= 0 else f'{left:.0f} 秒后'}")
+
+
+def countdown(seconds):
+    """和原来的倒计时一样每秒刷新一次，只是秒数由调度器算"""
+    remaining = int(seconds + 0.999)
+    for i in range(remaining, 0, -1):
+        sys.stdout.write(f"\r下一个任务倒计时：{i} 秒    ")
+        sys.stdout.flush()
+        gui.sleep(1)
+    print("\r倒计时结束！          ")
+
+
+if __name__ == '__main__':
+    import importlib
+
+    module = importlib.import_module(sys.argv[1] if len(sys.argv) > 1 else 'axie_land')
+    module.scheduler.summary()
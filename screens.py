@@ -0,0 +1,83 @@
+"""一张截图判断游戏现在在哪个画面：join、选模式、游戏里、维护/退出、卡住要重试、什么都认不出（没开）
+
+每个画面有几张特征模板，只在各自的固定区域里找（按窗口大小的比例写，多窗口时按各自的窗口换算），
+一次截图、所有特征模板并行匹配，按 SIGNATURES 的顺序取第一个命中的画面。
+"""
+from collections import namedtuple
+
+from frame import Frame, screen_region
+from inputs import gui
+from matching import locate, parallel_map
+from metrics import metrics
+from templates import registry
+
+
+EXIT = 'exit'          # 维护 / 被踢出
+JOIN = 'join'
+MODE = 'mode'          # 选模式（1axie_mode / tab）
+STUCK = 'stuck'        # 卡住了（stuck / stuck_axie），有 retry 按钮就点它
+IN_GAME = 'in_game'
+UNKNOWN = 'unknown'    # 一张都没认出来：游戏没开，或者在两个画面之间
+
+# (画面, 模板, 找图参数, 固定区域)；固定区域是 (左, 上, 右, 下) 占窗口宽高的比例，
+# 认不出某个画面时先用录下来的截图核对它的区域，宁可大一点
+Signature = namedtuple('Signature', ['state', 'name', 'options', 'region'])
+
+SIGNATURES = [
+    Signature(EXIT, 'exit', {'color': False}, (0.2, 0.2, 0.8, 0.8)),
+    Signature(STUCK, 'retry', {}, (0.2, 0.3, 0.8, 0.9)),
+    Signature(STUCK, 'stuck', {}, (0.2, 0.2, 0.8, 0.8)),
+    Signature(STUCK, 'stuck_axie', {}, (0.2, 0.2, 0.8, 0.8)),
+    Signature(JOIN, 'join', {}, (0.2, 0.4, 0.8, 1.0)),
+    Signature(MODE, '1axie_mode', {}, (0.1, 0.1, 0.9, 0.9)),
+    Signature(MODE, 'tab', {}, (0.1, 0.1, 0.9, 0.9)),
+    Signature(IN_GAME, 'acoin', {}, (0.5, 0.0, 1.0, 0.3)),
+    Signature(IN_GAME, 'homeland', {'gray_diff_threshold': 12}, (0.0, 0.0, 1.0, 0.5)),  # 和原来的 in_game() 一样
+]
+
+Screen = namedtuple('Screen', ['state', 'hits', 'frame'])
+
+
+def region_of(fraction):
+    """把按窗口比例写的区域换成当前窗口里的屏幕坐标"""
+    sx1, sy1, sx2, sy2 = screen_region()
+    w, h = sx2 - sx1, sy2 - sy1
+    return (sx1 + int(w * fraction[0]), sy1 + int(h * fraction[1]),
+            sx1 + int(w * fraction[2]), sy1 + int(h * fraction[3]))
+
+
+def classify(frame=None):
+    """返回 Screen(state, {模板: 命中框}, frame)"""
+    with metrics.call('screen', ','.join(s.name for s in SIGNATURES)):
+        frame = frame or Frame.capture()
+        frame.bgr, frame.gray  # 并行匹配前先转好
+        signatures = [s for s in SIGNATURES if registry.get(s.name) is not None]
+
+        def match(signature):
+            options = dict(signature.options)
+            options.setdefault('threshold', registry.match_threshold(signature.name, options.get('color', True)))
+            return locate(registry.get(signature.name), region=region_of(signature.region), frame=frame, **options)
+
+        boxes = parallel_map(match, signatures)
+        hits = {s.name: box for s, box in zip(signatures, boxes) if box is not None}
+        state = next((s.state for s in signatures if s.name in hits), UNKNOWN)
+        metrics.set(hit=state != UNKNOWN, state=state)
+        return Screen(state, hits, frame)
+
+
+def center(box):
+    return (box[0] + box[2]) // 2, (box[1] + box[3]) // 2
+
+
+def wait_change(previous, timeout=45, min_poll=0.5, max_poll=2.0):
+    """等画面离开 previous 状态（认不出来的中间画面不算），超时返回最后一次的结果"""
+    start = gui.now()
+    interval = min_poll
+    while True:
+        screen = classify()
+        if screen.state not in (previous, UNKNOWN):
+            return screen
+        if gui.now() - start >= timeout:
+            return screen
+        gui.sleep(interval)
+        interval = min(interval * 2, max_poll)
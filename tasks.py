@@ -0,0 +1,673 @@
+import os
+import threading
+import numpy as np
+from templates import registry
+from inputs import gui
+from frame import Frame, in_window, screen_region
+from matching import color_diff, find_all, locate, match_families, scan_points
+from metrics import metrics
+from waits import changed, near, signature, wait, wait_any
+from harvest import harvest
+import pipeline
+from workflow import step, step_cache
+import screens
+
+
+# 两个脚本原来写死的差异都放在这里，由各自的 profile 通过 configure() 改
+SETTINGS = {
+    'land_path': r"E:\Axie Infinity - Homeland\Homeland.exe",
+    'join_clicks': 3,
+    'harvest_click': 'confirm',         # confirm：点一下按空格确认再点下方；quick：连点两下再确认
+    'kitchen4_crafts': 1,               # cuddle_kitchen4 点几次 craft
+    'equip_items': [                    # craft_equip 要做的 (物品, 制作次数, gray_diff_threshold)
+        ('iron_sword', 2, 9),
+        ('steel_chain_mail', 2, None),
+        ('gold_emerald', 1, None),
+        ('silver', 1, None),
+    ],
+    'equip_crafts': 1,                  # 每件装备点几次 craft
+    'discard_expand': True,             # 丢矿前先点开 down_arrow
+    'inventory_pitch': 64,              # 背包相邻两格中心的距离（像素），不能比实际的大，否则相邻两格会被当成一格
+    'gem_ore_radius': 60,               # 悬停后在鼠标周围多大范围里找 gem_ore 提示（用录制的截图核对过再改）
+    'craft_queue_roi': (-300, -250, 300, 0),  # 以 craft 按钮中心为原点的制作队列区域，按钮那几行会去掉
+    'craft_cycle': 5400,                # 队列排满的建筑多久之内不再打开（秒），和制作时间一样
+    'craft_retry': 1800,                # 队列没排满（没看到满、材料不够、没找到建筑）时多久后再来补（秒）
+}
+
+
+def configure(**settings):
+    for key, value in settings.items():
+        if key not in SETTINGS:
+            print(f"[WARN] 未知的设置: {key}")
+            continue
+        SETTINGS[key] = value
+
+
+def image(png, threshold=None, offset=(0, 0), click_times=1, region=None, color=True, gray_diff_threshold=None,
+          frame=None, pyramid=None):
+    """threshold / gray_diff_threshold 不传时用 thresholds.json 里校准过的值，没校准过用 0.8 / 15
+
+    校准过的阈值只用于彩色匹配，color=False 时默认 0.8。
+    """
+    if not png.endswith('.png'):
+        png += '.png'
+    entry = registry.get(png)
+    if entry is None:
+        print(f"[ERROR] 图片不存在: {os.path.join(registry.pic_dir, png)}")
+        return None
+    if threshold is None:
+        threshold = registry.match_threshold(entry.name, color)
+    if gray_diff_threshold is None:
+        gray_diff_threshold = registry.gray_diff(entry.name)
+
+    found = step_cache.MISSING
+    if frame is None and region is None and pyramid is None:
+        # 步骤开始时已经一起找过的图，这期间没有输入就直接用结果
+        found = step_cache.get(entry.name, threshold, color, gray_diff_threshold)
+    if found is step_cache.MISSING:
+        found = locate(entry, threshold, region, color, gray_diff_threshold, frame, pyramid)
+    if found is None:
+        return None
+
+    left, top, right, bottom, _ = found
+    center_x = (left + right) // 2 + offset[0]
+    center_y = (top + bottom) // 2 + offset[1]
+    if click_times > 0:
+        for _ in range(click_times):
+            gui.click(center_x, center_y)
+            wait(1, region=near(center_x, center_y))
+        print(f"[ACTION] 点击 {png} {center_x, center_y} {threshold}")
+
+    return (center_x, center_y)
+
+
+thresholds = {
+    "tree1": 0.85,
+    "tree2": 0.8,
+    "tree3": 0.85,
+    "tree4": 0.8,
+    "tree5": 0.95,
+    "tree6": 0.95,
+    "tree7": 0.9,
+    "tree8": 0.9,
+    "tree9": 0.9,
+    "stone1": 0.95,
+    "stone2": 0.9,
+    "stone4": 0.9,
+    "precious": 0.8,
+    "metal": 0.8
+}
+thresholds.update(registry.family_thresholds())  # 校准过的组覆盖上面手调的值
+
+TREE_KEYS = ['tree1', 'tree2', 'tree3', 'tree4', 'tree5', 'tree6', 'tree7', 'tree8', 'tree9']
+STONE_KEYS = ['stone1', 'stone2', 'stone4']
+
+
+def image_multi(png_list, thresholds=thresholds, region=None, min_x_distance=40, min_y_distance=40, click_times=0,
+                excluded_points=None, frame=None, pyramid=None):
+    if isinstance(png_list, str):
+        png_list = [png_list]
+
+    if not thresholds:
+        raise ValueError("阈值字典 (thresholds) 必须提供")
+
+    results, first = match_families(png_list, thresholds, region, frame, min_x_distance, min_y_distance,
+                                    excluded_points, pyramid)
+
+    # 点击全局第一个通过筛选的点
+    if click_times > 0 and first is not None:
+        cx, cy, score, entry = first
+        for _ in range(click_times):
+            print(f"[INFO] 点击匹配点：({entry.path} {cx}, {cy})，匹配度：{score:.3f}")
+            harvest_click(cx, cy)
+
+    return results
+
+
+def confirm_click(cx, cy):
+    """点一下采集点，空格确认，再点下方 25 像素处并确认"""
+    gui.click(cx, cy)
+    wait(1, region=near(cx, cy))
+    press('space')
+    gui.click(cx, cy+25)
+    wait(1, region=near(cx, cy + 25))
+    press('space')
+
+
+def quick_click(cx, cy):
+    """连点采集点和下方 25 像素处，最后空格确认一次"""
+    gui.click(cx, cy)
+    gui.click(cx, cy + 25)
+    wait(1, region=near(cx, cy + 25))
+    gui.press('space')
+
+
+def quick_stone_click(cx, cy):
+    quick_click(cx, cy)
+    gui.click(cx, cy + 25)  # 石头需要额外点击
+
+
+# harvest_click 设置 -> (砍树, 采石头)
+HARVEST_CLICKS = {
+    'confirm': (confirm_click, confirm_click),
+    'quick': (quick_click, quick_stone_click),
+}
+
+
+def harvest_click(cx, cy):
+    HARVEST_CLICKS[SETTINGS['harvest_click']][0](cx, cy)
+
+
+def harvest_stone_click(cx, cy):
+    HARVEST_CLICKS[SETTINGS['harvest_click']][1](cx, cy)
+
+
+def loading(image_names, check_interval: float = 1, threshold=0.8, click_times=1, timeout=45):
+    """等任意一张指定图片出现并点击，返回出现的图片名，超时返回None"""
+    with metrics.call('loading', ','.join(image_names)):
+        print(f"正在加载 {image_names} ... ")
+        result = wait_any(image_names, timeout=timeout, threshold=threshold, max_poll=check_interval)
+        if result is None:
+            print(f"加载 {image_names} 超时")
+            return None
+
+        if click_times > 0:
+            for _ in range(click_times):
+                gui.click(*result.pos)
+                wait(1, region=near(*result.pos))
+            print(f"[ACTION] 点击 {result.name} {result.pos} {threshold}")
+        return result.name
+
+
+def drag(start_pos, end_pos, duration=1):
+    start_x, start_y = start_pos
+    end_x, end_y = end_pos
+
+    # 移动到起始位置
+    gui.moveTo(start_x, start_y)
+    gui.mouseDown(button='left')
+    gui.moveTo(end_x, end_y, duration=duration)
+    gui.mouseUp(button='left')
+    wait(1, region=near(end_x, end_y))
+
+
+def press(button):
+    gui.keyDown(button)
+    gui.keyUp(button)
+    wait(1)
+    # print(f'按键 {button}')
+
+
+def hotkey(button1, button2):
+    gui.keyDown(button1)
+    gui.keyDown(button2)
+    gui.keyUp(button1)
+    gui.keyUp(button2)
+
+
+def in_game():
+    return screens.classify().state == screens.IN_GAME
+
+
+@step('homeland', 'join', '1axie_mode', 'tab', 'acoin', 'x', 'M', 'exit', 'retry', 'stuck', 'stuck_axie')
+def enter_game(max_steps=12, max_repeats=3):
+    """按当前画面一步步进游戏；每一步只截一张图判断画面，操作后等画面变了再判断下一步
+
+    同一个画面连续 max_repeats 次没走出去就关掉游戏重开（最多一次），总共最多 max_steps 步。
+    多窗口的 worker 里不重启、不启动游戏：taskkill 会关掉所有窗口的游戏，新开的游戏也不会在这个窗口的位置。
+    和原来一样：刚启动的游戏 join 只点一次；点过 join / 选过模式之后进到游戏里先点一下 acoin。
+    """
+    launched = restarted = joined = False
+    previous, repeats = None, 0
+    screen = screens.classify()
+    for _ in range(max_steps):
+        state = screen.state
+        repeats = repeats + 1 if state == previous else 1
+        previous = state
+        print(f"[INFO] 当前画面: {state}")
+
+        if state == screens.IN_GAME:
+            if 'homeland' in screen.hits:
+                x, y = screens.center(screen.hits['homeland'])
+                gui.click(x + 100, y)  # 原来的 in_game() 看到 homeland 都会点一下它右边
+            if joined and 'acoin' in screen.hits:
+                x, y = screens.center(screen.hits['acoin'])
+                gui.click(x, y)  # 原来 join / 选模式之后的 loading(['acoin']) 会点它
+                wait(1, region=near(x, y))
+            if launched:
+                image('x')
+                image('M')
+            return True
+
+        if repeats > max_repeats:
+            if restarted or in_window():
+                print(f"[FAIL] 一直停在 {state}，放弃进入游戏")
+                return False
+            print(f"[WARN] 一直停在 {state}，重启游戏")
+            close_game()
+            restarted = True
+            screen = screens.classify()
+            continue
+
+        if state == screens.EXIT:
+            gui.sleep(60)  # 维护中，隔一分钟再看
+            screen = screens.classify()
+            continue
+        if state == screens.STUCK:
+            if 'retry' in screen.hits:
+                gui.click(*screens.center(screen.hits['retry']))
+            else:
+                print("[WARN] 卡住了但没找到 retry，等它自己变化")
+        elif state == screens.JOIN:
+            for _ in range(1 if launched else SETTINGS['join_clicks']):  # 原来刚启动时 loading(['join']) 只点一次
+                gui.click(*screens.center(screen.hits['join']))
+                wait(1)
+            joined = True
+        elif state == screens.MODE:
+            if 'tab' in screen.hits:
+                gui.click(*screens.center(screen.hits['tab']))
+                joined = True
+            else:
+                print("[WARN] 选模式画面没找到 tab")
+        elif in_window():
+            print("[WARN] 认不出窗口里的画面，等它自己变化（不在 worker 里启动游戏）")
+        else:
+            print("当前不在游戏中。")
+            gui.launch(SETTINGS['land_path'])
+            launched = True
+        screen = screens.wait_change(state, timeout=90 if state == screens.UNKNOWN else 45)
+
+    print("[FAIL] 进入游戏步数超过上限")
+    return False
+
+
+@step()
+def close_game():
+    gui.kill('Homeland.exe')
+    gui.sleep(10)
+
+
+@step(*TREE_KEYS, *STONE_KEYS, 'storage')
+def collect(tree_count, stone_count):
+    """
+    同时采集树和石头的函数
+    :param tree_count: 采集树的次数
+    :param stone_count: 采集石头的次数
+    """
+    # 按下并保持Shift+Q；中途出错也要松开，不然游戏里一直是采集模式
+    gui.keyDown('shift')
+    gui.keyDown('q')
+    try:
+        # 采集树：全屏找一次，按离鼠标最近的顺序依次砍
+        clicked_points = harvest(TREE_KEYS, thresholds, tree_count, harvest_click, '树')
+        if len(clicked_points) < tree_count:
+            print("[MISS] 没有可砍的树了。")
+        print("[INFO] 树木采集结束")
+
+        # 采集石头
+        clicked_points = harvest(STONE_KEYS, thresholds, stone_count, harvest_stone_click, '石头')
+        if len(clicked_points) < stone_count:
+            print("[MISS] 没有可采的石头了。")
+        print("[INFO] 石头采集结束")
+    finally:
+        # 释放按键
+        gui.keyUp('q')
+        gui.keyUp('shift')
+    wait(3)
+
+    pos = image('storage', click_times=0)
+    if pos is not None:
+        x, y = pos
+        gui.moveTo(x, y)
+        gui.sleep(10)
+
+
+@step('acoin', 'home', 'gem_ore', probe=('acoin',))
+def mine(scan=True):
+    image('acoin')
+    press('3')
+    wait(5, appear='home')  # 下面要找 home，出现了就不用等满
+
+    # 获取home位置作为基准点
+    frame = Frame.capture()
+    home_pos = image('home', click_times=0, frame=frame)
+    if home_pos is None:
+        print("[ERROR] 未找到home坐标")
+        press('1')
+        wait(5)
+        return
+
+    base_x, base_y = home_pos
+    # 定义矿的位置和自家的相对坐标列表，可以随时添加新的矿点
+    relative_positions = [(70,45),(-16,85),(45,-195),(25,-70),(120,-20),(-115,188),(-163,112),(-250,69),(-654,124),
+                          (-531,-248),(475,-67),(563,-27),(650,68),(381,214),(-397,277),(-498,329),(-400,-68),
+                          (-350,-275),(-270,240),(417,-137),(300,260),(94,407),(-450,418)
+    ]
+
+    targets = [(base_x + dx, base_y + dy) for dx, dy in relative_positions]
+    candidates = list(targets)
+    if scan:
+        # 用找 home 的同一张图，一次性看每个矿点附近有没有 gem_ore，有的就不用过去了
+        marked = scan_points('gem_ore', targets, frame=frame)
+        skipped = [target for target, (_, hit) in zip(targets, marked) if hit]
+        targets = [target for target, (_, hit) in zip(targets, marked) if not hit]
+        print(f"[INFO] 扫描矿点：{len(skipped)} 个不用去，{len(targets)} 个需要悬停确认")
+
+    # 遍历每个点；先只看目标附近，别的矿点留着的标记不算
+    radius = SETTINGS['gem_ore_radius']
+    for target_x, target_y in targets:
+        # 悬停、看提示、按空格要连着做，中间别的窗口插进来会把鼠标挪走
+        with gui.exclusive():
+            # 移动到目标位置
+            gui.moveTo(target_x, target_y)
+            region = pipeline.around((target_x, target_y), radius)
+            wait(1, region=region, appear='gem_ore')  # 悬停提示出现就不用等满 1 秒
+            shown = image('gem_ore', click_times=0, region=region) is not None
+            if not shown:
+                shown = _marker_elsewhere((target_x, target_y), candidates, radius)
+            if not shown:
+                press('space')
+                press('space')
+
+    print("[INFO] 矿采集结束")
+    press('1')
+    wait(5)
+
+
+CRAFT_FULL = 'full'              # 连续 CRAFT_REFUSED 次点完 craft 队列区域都没变化：队列满了
+CRAFT_NO_MATERIAL = 'material'   # 点完 craft 按钮变灰：材料不够再做一个了
+CRAFT_GRAY_RATIO = 0.5           # 按钮颜色均差掉到点之前的这个比例以下算变灰
+CRAFT_REFUSED = 2                # 偶尔一次没变可能只是界面慢，连续这么多次才算满
+
+_plot = threading.local()        # 每个窗口当前在哪块地，switch_plot 里记
+_full = {}                       # (窗口, 地, 建筑) -> 发现队列排满的时间
+
+
+def _clamp(box):
+    sx1, sy1, sx2, sy2 = screen_region()
+    return max(sx1, box[0]), max(sy1, box[1]), min(sx2, box[2]), min(sy2, box[3])
+
+
+def _button_color(box):
+    # color_diff 直接拿 uint8 相减会回绕，这里要的是真实的颜色差，先转 int16
+    return color_diff(Frame.capture(box).bgr.astype(np.int16))
+
+
+def _building_key(building):
+    return screen_region(), getattr(_plot, 'name', None), building
+
+
+def is_full(building):
+    """building 这一轮（craft_cycle 秒内）已经排满过，不用再打开"""
+    found = _full.get(_building_key(building))
+    if found is not None and gui.now() - found < SETTINGS['craft_cycle']:
+        print(f"[INFO] {building} 的队列这一轮已经排满，跳过")
+        return True
+    return False
+
+
+def next_craft(*buildings):
+    """做完一次制作任务后给调度器的冷却秒数：排满的建筑等到这一轮结束，没排满的 craft_retry 秒后再来补"""
+    now = gui.now()
+    cooldowns = []
+    for building in buildings:
+        found = _full.get(_building_key(building))
+        if found is not None and now - found < SETTINGS['craft_cycle']:
+            cooldowns.append(SETTINGS['craft_cycle'] - (now - found))
+        else:
+            cooldowns.append(SETTINGS['craft_retry'])
+    return min(cooldowns)
+
+
+def craft(times, color=True, building=None):
+    """点 craft 最多 times 次，有确切迹象说明排不进去了才提前停，看不出来就照常点
+
+    - 队列满：连续 CRAFT_REFUSED 次点完 craft，按钮上方的队列区域（craft_queue_roi）都没变化；
+    - 材料不够：craft 按钮明显变灰。
+    返回 (点了几次, 停下的原因)：原因是 CRAFT_FULL / CRAFT_NO_MATERIAL，点满 times 次是 None。
+    给了 building 时，队列满了就记下来，这一轮里 is_full(building) 为 True。
+    """
+    pos = image('craft', click_times=0, color=color)
+    if pos is None:
+        return 0, None
+    x, y = pos
+    entry = registry.get('craft.png')
+    dx1, dy1, dx2, dy2 = SETTINGS['craft_queue_roi']
+    button = _clamp((x - entry.w // 2, y - entry.h // 2, x + entry.w // 2, y + entry.h // 2))
+    # 按钮自己点下去会变色，队列区域只到按钮上沿
+    roi = _clamp((x + dx1, y + dy1, x + dx2, min(y + dy2, button[1])))
+
+    colorful = _button_color(button)
+    before = signature(roi)
+    clicks = refused = 0
+    for _ in range(times):
+        gui.click(x, y)
+        clicks += 1
+        wait(1, region=roi)
+        after = signature(roi)
+        refused = 0 if changed(before, after) else refused + 1
+        before = after
+        if refused >= CRAFT_REFUSED:
+            print(f"[INFO] 队列已满，craft 点了 {clicks} 次")
+            if building is not None:
+                _full[_building_key(building)] = gui.now()
+            return clicks, CRAFT_FULL
+        if _button_color(button) < colorful * CRAFT_GRAY_RATIO:
+            print(f"[INFO] 材料不够了，craft 点了 {clicks} 次")
+            return clicks, CRAFT_NO_MATERIAL
+    print(f"[ACTION] 点击 craft {clicks} 次")
+    return clicks, None
+
+
+def _marker_elsewhere(target, candidates, radius):
+    """鼠标附近没找到 gem_ore 提示时全屏再找一次，其他矿点附近的标记不算"""
+    others = [point for point in candidates if point != target]
+    hits = find_all(['gem_ore'], threshold=0.8, gray_diff_threshold=registry.gray_diff('gem_ore'), min_distance=radius,
+                    excluded_points=others, max_hits=1)
+    if hits:
+        print(f"[INFO] gem_ore 提示不在鼠标附近，在 ({hits[0].x}, {hits[0].y})，可以调大 gem_ore_radius")
+    return bool(hits)
+
+
+@step('P', 'cuddle_kitchen1', 'cuddle_kitchen4', 'claim', 'ok', 'baguette', 'boiled_carrot', 'craft', '#2',
+      'left_arrow', 'acoin', probe=('P',))
+def craft_food():
+    image('P')
+    if is_full('cuddle_kitchen1'):
+        pass
+    elif image('cuddle_kitchen1', click_times=2):
+        wait(2)
+        image('claim'), wait(1)
+        image('ok', color=False), wait(1)
+        image('baguette')
+        craft(5, color=False, building='cuddle_kitchen1')
+        gui.press('Esc')
+        image('acoin', offset=(-100, 0))
+        wait(3)
+    else:
+        print("未找到cuddle_kitchen1")
+    if is_full('cuddle_kitchen4'):
+        pass
+    elif image('cuddle_kitchen4', click_times=2):
+        wait(2)
+        if image('#2', click_times=0):
+            image('left_arrow'), wait(1)
+        image('claim'), wait(1)
+        image('ok', color=False), wait(1)
+        image('boiled_carrot')
+        craft(SETTINGS['kitchen4_crafts'], color=False, building='cuddle_kitchen4')
+
+        # image('right_arrow'), wait(1)
+        # image('claim'), wait(1)
+        # image('ok', color=False), wait(1)
+        # image('boiled_carrot')
+        # image('craft', color=False)
+
+        gui.press('Esc')
+        image('acoin', offset=(-100, 0))
+        wait(3)
+    else:
+        print("未找到cuddle_kitchen4")
+    return next_craft('cuddle_kitchen1', 'cuddle_kitchen4')
+
+
+@step('hammer_hut4', '#2', 'left_arrow', 'iron_sword', 'steel_chain_mail', 'gold_emerald', 'silver', 'craft',
+      'right_arrow', 'acoin', probe=('hammer_hut4',))
+def craft_equip():
+    # 要制作的物品列表，每个元素是(物品名称, 制作次数, gray_diff_threshold)
+    items_to_craft = SETTINGS['equip_items']
+
+    if is_full('hammer_hut4'):
+        return next_craft('hammer_hut4')
+    if image('hammer_hut4', click_times=2):
+        wait(2)
+        if image('#2', click_times=0):
+            image('left_arrow'), wait(1)
+
+        # 循环制作每个物品，队列满了后面的物品也排不进去，直接关掉
+        full = False
+        for item_name, repeat_times, gray_threshold in items_to_craft:
+            for _ in range(repeat_times):
+                if gray_threshold:
+                    image(item_name, gray_diff_threshold=gray_threshold)
+                else:
+                    image(item_name)
+                _, stopped = craft(SETTINGS['equip_crafts'], building='hammer_hut4')
+                wait(3)
+                if stopped == CRAFT_FULL:
+                    full = True
+                    break
+                if repeat_times > 1:  # 如果需要制作多次，点击右箭头
+                    image('right_arrow'), wait(1)
+            if full:
+                break
+
+        press('Esc')
+        image('acoin', offset=(-100, 0))
+        wait(3)
+    else:
+        print("未找到hammer_hut4")
+    return next_craft('hammer_hut4')
+
+
+@step('plot', 'acoin', '{0}', probe=('plot',))
+def switch_plot(plot):
+    _plot.name = plot
+    image('plot')
+    if plot == '57_119':
+        image('acoin', offset=(-420, 280))  # 自己的地
+    image(plot)
+    wait(5)
+    if plot == '105_128':
+        image('acoin', offset=(-340, 280))  # 别人的地
+    image(plot)
+    wait(5)
+    for _ in range(5):
+        gui.scroll(30)
+        wait(1)
+    gui.press("A"), wait(3)
+    image('acoin', offset=(-410, 810))  # 左下角收菜的位置
+    wait(3)
+
+
+@step('inventory', 'miners_mass', 'down_arrow', '{0}', '{1}', 'discard')
+def discard(ore1, ore2=None):
+    press('v'), wait(3, appear='inventory')
+    image('inventory', offset=(-50, 110))  # 苹果
+    image('inventory', offset=(615, 110))  # Metalwork
+    image('miners_mass')
+    if SETTINGS['discard_expand']:
+        image('down_arrow')
+        image('down_arrow', offset=(-180, 180))
+    # 打开背包后只截一次图，把每种矿所在的格子都找出来
+    discard_cells(list(dict.fromkeys(o for o in (ore1, ore2) if o)), Frame.capture())  # 避免重复处理同一个矿石
+    press('esc')
+
+
+def discard_cells(ores, frame, limit=5):
+    """丢掉 frame 里所有 ores 的格子，每种矿最多丢 limit 次
+
+    所有矿的格子在同一张图上一次找完（截图缓冲区会被后面的截图复用，要马上用），
+    然后一起从最后一格往前丢：前面的格子空出来时后面的格子往前挪，不会挪到还没处理的格子上。
+    每次丢之前都只截那一格确认一下还是这种矿，丢完格子里还有就接着丢。
+    """
+    cells = []
+    for ore in ores:
+        entry = registry.get(ore)
+        if entry is None:
+            print(f"[ERROR] 图片不存在: {ore}")
+            continue
+        # 同一格里的峰值离得再近也只算一格，一格最多点一次
+        hits = find_all([ore], threshold=0.95, frame=frame, gray_diff_threshold=registry.gray_diff(ore),
+                        min_distance=SETTINGS['inventory_pitch'])
+        print(f"[INFO] {ore}：找到 {len(hits)} 格")
+        cells += hits
+    radius = _probe_radius(ores)
+    counts = dict.fromkeys(ores, 0)
+    for hit in sorted(cells, key=lambda h: (h.y, h.x), reverse=True):
+        pos = (hit.x, hit.y)
+        while counts[hit.name] < limit:
+            pos = _confirm_at((pos[0], pos[1], hit.name), Frame.capture(pipeline.around(pos, radius)))
+            if pos is None:
+                break
+            gui.click(*pos), wait(1, region=near(*pos))
+            image('discard'), wait(1)
+            press('enter'), wait(3)
+            counts[hit.name] += 1
+    for ore, count in counts.items():
+        print(f"[INFO] {ore}：丢了 {count} 次")
+    return counts
+
+
+TRANSFER_IMAGES = ['gold_transfer1', 'gold_transfer2', 'gold_transfer3',
+                   'iron_transfer1', 'iron_transfer2', 'iron_transfer3',
+                   'platinum_transfer1', 'platinum_transfer2', 'platinum_transfer3']
+
+
+def _probe_radius(names, margin=20):
+    """复查时截的小块要放得下整张模板"""
+    return max((max(entry.w, entry.h) for entry in map(registry.get, names) if entry is not None), default=0) + margin
+
+
+def _confirm_at(point, frame):
+    """point = (x, y, 模板名)，在 point 附近的小块截图 frame 里重新找这张模板，返回新坐标或 None"""
+    hits = find_all([point[2]], threshold=0.95, frame=frame, gray_diff_threshold=registry.gray_diff(point[2]),
+                    min_distance=100, max_hits=1)
+    return (hits[0].x, hits[0].y) if hits else None
+
+
+def _click_transfer(x, y):
+    gui.click(x, y)
+    wait(0.5, region=near(x, y))  # 给界面反应时间
+
+
+@step('transfer', *TRANSFER_IMAGES, 'destination', 'confirm_transfer')
+def transfer():
+    press('r')
+    wait(1)
+    image('transfer', offset=(-350, 105))
+
+    clicked_positions = []
+    max_attempts = 15  # 最多尝试找图的次数
+    radius = _probe_radius(TRANSFER_IMAGES)
+
+    for _ in range(max_attempts):
+        # 一次截图匹配全部 9 张图，已点过的位置（容差100像素）直接排除
+        hits = find_all(TRANSFER_IMAGES, threshold=0.95, min_distance=100, excluded_points=clicked_positions)
+        if not hits:
+            # 本轮没找到任何新图，提前结束避免无效循环
+            break
+
+        # 点当前这张时，后台在下一张附近重新确认一次，列表滚动过就按新位置点
+        route = [(hit.x, hit.y, hit.name) for hit in hits]
+        clicked_positions += pipeline.run(route, _confirm_at, _click_transfer, radius=radius,
+                                          limit=max_attempts - len(clicked_positions), first_checked=True)
+        if len(clicked_positions) >= max_attempts:
+            return
+
+    image('destination'), wait(3)
+    image('confirm_transfer', offset=(-1000, -350))
+    image('confirm_transfer')
+    image('transfer', offset=(640, 790))
+    press('enter'), wait(3)
+    press('esc')
@@ -0,0 +1,412 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+PIC_DIR = 'pic'
+THRESHOLDS_FILE = 'thresholds.json'  # calibrate.py 生成
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_GRAY_DIFF = 15
+MASK_SUFFIX = '_mask'  # pic/tree4_1_mask.png 是 tree4_1 的遮罩：白色是要比对的部分，黑色是草地等背景
+ATLAS_FILE = 'atlas.npy'  # 所有模板打包成一个可以 mmap 的文件，索引在同名 .json 里
+ATLAS_VERSION = 1
+ATLAS_ALIGN = 64
+
+
+def tighten(bgr, mask):
+    """按遮罩把模板四周的背景裁掉，返回 (bgr, mask, (裁掉的左边, 上边))；裁完全是前景时 mask 返回 None"""
+    if mask is None:
+        return bgr, None, (0, 0)
+    ys, xs = np.nonzero(mask)
+    if not len(xs):
+        return bgr, None, (0, 0)
+    x1, y1, x2, y2 = xs.min(), ys.min(), xs.max() + 1, ys.max() + 1
+    bgr = bgr[y1:y2, x1:x2].copy()
+    mask = mask[y1:y2, x1:x2].copy()
+    if mask.all():
+        mask = None
+    return bgr, mask, (int(x1), int(y1))
+
+
+class Template:
+    """mask 不为 None 时只比对遮罩里的像素；有遮罩的模板已经裁到前景的外接矩形，w / h 是裁完的尺寸"""
+
+    def __init__(self, name, path, mtime, bgr, mask=None, gray=None, full_size=None, crop=None):
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        if full_size is None:
+            self.full_h, self.full_w = bgr.shape[:2]
+            self.bgr, self.mask, self.crop = tighten(bgr, mask)
+        else:
+            # 从 atlas 里恢复：已经裁好、灰度图也现成
+            self.full_w, self.full_h = full_size
+            self.bgr, self.mask, self.crop = bgr, mask, tuple(crop)
+        self.gray = gray if gray is not None else cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+        self.mapped = full_size is not None
+        self.h, self.w = self.bgr.shape[:2]
+        self._scaled = {}
+        self._masks = {}
+
+    def detach(self):
+        """把 atlas 里映射出来的数组拷成自己的，重写 atlas 前要先放开旧文件（Windows 上映射着的文件不能替换）"""
+        if not self.mapped:
+            return
+        self.bgr, self.gray = self.bgr.copy(), self.gray.copy()
+        self.mask = None if self.mask is None else self.mask.copy()
+        self._masks = {}
+        self.mapped = False
+
+    @property
+    def anchor(self):
+        """裁后模板左上角到原来整张模板中心的偏移：点击位置、offset= 都还按原来那张图的中心算，加不加遮罩都不变"""
+        return self.full_w // 2 - self.crop[0], self.full_h // 2 - self.crop[1]
+
+    def view(self, color=True):
+        return self.bgr if color else self.gray
+
+    def scaled(self, scale, color=False):
+        key = (scale, color)
+        if key not in self._scaled:
+            self._scaled[key] = cv2.resize(self.view(color), None, fx=scale, fy=scale,
+                                           interpolation=cv2.INTER_AREA)
+        return self._scaled[key]
+
+    def mask_view(self, color=True, scale=None):
+        """和 view(color) / scaled(scale, color) 同样大小、同样通道数的遮罩；没有遮罩返回 None"""
+        if self.mask is None:
+            return None
+        key = (scale, color)
+        if key not in self._masks:
+            mask = self.mask
+            if scale is not None:
+                h, w = self.scaled(scale, color).shape[:2]
+                mask = cv2.resize(mask, (w, h), interpolation=cv2.INTER_NEAREST)
+            self._masks[key] = cv2.merge([mask] * 3) if color else mask
+        return self._masks[key]
+
+    def __repr__(self):
+        if self.mask is None and (self.w, self.h) == (self.full_w, self.full_h):
+            return f"Template({self.name}, {self.w}x{self.h})"
+        masked = self.mask is not None
+        return f"Template({self.name}, {self.w}x{self.h} of {self.full_w}x{self.full_h}, masked={masked})"
+
+
+def _read(path, mask_path):
+    """读模板和遮罩：单独的 _mask.png 优先，其次 PNG 自带的透明通道"""
+    raw = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if raw is None:
+        return None, None
+    mask = None
+    if raw.ndim == 2:
+        bgr = cv2.cvtColor(raw, cv2.COLOR_GRAY2BGR)
+    elif raw.shape[2] == 4:
+        bgr = raw[:, :, :3].copy()
+        mask = raw[:, :, 3]
+    else:
+        bgr = raw[:, :, :3]
+    if os.path.exists(mask_path):
+        mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
+        if mask is None or mask.shape != bgr.shape[:2]:
+            print(f"[WARN] 遮罩和模板大小不一致，忽略: {mask_path}")
+            mask = None
+    if mask is not None:
+        mask = np.where(mask > 127, 255, 0).astype(np.uint8)
+    return bgr, mask
+
+
+def family_of(name):
+    """tree1_3 -> tree1, stone_10 -> stone；不是 xxx_数字 格式的返回 None"""
+    prefix, sep, suffix = name.rpartition('_')
+    if sep and suffix.isdigit():
+        return prefix
+    return None
+
+
+def _family_order(name):
+    suffix = name.rpartition('_')[2]
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def _atlas_index_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+def write_atlas(templates, path=ATLAS_FILE, calibration=None):
+    """把模板的 BGR / 灰度 / 遮罩顺序拼进一个 uint8 数组存成 .npy，位置、尺寸、组、阈值写进 .json"""
+    arrays = []
+    offset = 0
+    index = {}
+    calibration = calibration or {'single': {}, 'family': {}}
+    for name in sorted(templates):
+        template = templates[name]
+        entry = {'path': template.path, 'mtime': template.mtime, 'full_size': [template.full_w, template.full_h],
+                 'crop': list(template.crop), 'family': family_of(name),
+                 'threshold': calibration['single'].get(name, {}).get('threshold'),
+                 'gray_diff': calibration['single'].get(name, {}).get('gray_diff')}
+        for key, array in (('bgr', template.bgr), ('gray', template.gray), ('mask', template.mask)):
+            if array is None:
+                entry[key] = None
+                continue
+            offset = -(-offset // ATLAS_ALIGN) * ATLAS_ALIGN
+            entry[key] = [offset, list(array.shape)]
+            arrays.append((offset, np.ascontiguousarray(array, dtype=np.uint8)))
+            offset += array.size
+        index[name] = entry
+
+    buffer = np.zeros(offset, np.uint8)
+    for start, array in arrays:
+        buffer[start:start + array.size] = array.ravel()
+    meta = {'version': ATLAS_VERSION, 'size': int(offset), 'built': time.time(), 'templates': index,
+            'family': calibration['family']}
+    tmp_path = path + '.tmp.npy'
+    np.save(tmp_path, buffer)
+    os.replace(tmp_path, path)
+    index_path = _atlas_index_path(path)
+    with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(index_path + '.tmp', index_path)
+
+
+def read_atlas(path=ATLAS_FILE, pic_dir=PIC_DIR):
+    """mmap 打开 atlas，返回 ({名字: Template}, 阈值)，模板数组直接是文件的视图，不拷贝；打不开返回 None"""
+    index_path = _atlas_index_path(path)
+    if not os.path.exists(path) or not os.path.exists(index_path):
+        return None
+    try:
+        with open(index_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        buffer = np.load(path, mmap_mode='r')
+    except (OSError, ValueError) as e:
+        print(f"[WARN] 读取 {path} 失败，改为逐个读 PNG: {e}")
+        return None
+    if meta.get('version') != ATLAS_VERSION or buffer.size != meta.get('size'):
+        return None
+    if any(os.path.dirname(entry['path']) != pic_dir for entry in meta['templates'].values()):
+        return None
+
+    def view(spec):
+        if spec is None:
+            return None
+        start, shape = spec
+        return np.asarray(buffer[start:start + int(np.prod(shape))]).reshape(shape)
+
+    templates = {}
+    calibration = {'single': {}, 'family': meta.get('family', {})}
+    for name, entry in meta['templates'].items():
+        templates[name] = Template(name, entry['path'], entry['mtime'], view(entry['bgr']), view(entry['mask']),
+                                   view(entry['gray']), entry['full_size'], entry['crop'])
+        single = {key: entry[key] for key in ('threshold', 'gray_diff') if entry.get(key) is not None}
+        if single:
+            calibration['single'][name] = single
+    return templates, calibration
+
+
+class TemplateRegistry:
+    """pic/ 下所有模板只解码一次，文件 mtime 变化时才重新读取"""
+
+    def __init__(self, pic_dir=PIC_DIR, thresholds_path=THRESHOLDS_FILE, atlas_path=ATLAS_FILE):
+        self.pic_dir = pic_dir
+        self.atlas_path = atlas_path
+        self._atlas_dirty = False
+        self.templates = {}
+        self.families = {}
+        self._dir_mtime = None
+        self._lock = threading.RLock()  # 多个窗口的 worker 线程会同时查模板
+        self.calibration = {'single': {}, 'family': {}}
+        self.load_calibration(thresholds_path)
+
+    def load_calibration(self, path=THRESHOLDS_FILE):
+        """读 calibrate.py 写的阈值文件；没有就全部用默认值"""
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] 读取 {path} 失败，使用默认阈值: {e}")
+            return
+        self.calibration = {'single': data.get('single', {}), 'family': data.get('family', {})}
+        print(f"[INFO] 已加载 {path}：{len(self.calibration['single'])} 张单图、"
+              f"{len(self.calibration['family'])} 组多模板的阈值")
+
+    def threshold(self, name, default=DEFAULT_THRESHOLD):
+        return self.calibration['single'].get(name, {}).get('threshold', default)
+
+    def match_threshold(self, name, color=True, default=DEFAULT_THRESHOLD):
+        """找图用的阈值：校准只在彩色分数上做，灰度匹配（color=False）的分数分布不一样，用 default"""
+        return self.threshold(name, default) if color else default
+
+    def gray_diff(self, name, default=DEFAULT_GRAY_DIFF):
+        return self.calibration['single'].get(name, {}).get('gray_diff', default)
+
+    def family_thresholds(self):
+        """{组名: 阈值}，可以直接 update 到 thresholds 字典里"""
+        return {name: entry['threshold'] for name, entry in self.calibration['family'].items()
+                if 'threshold' in entry}
+
+    def _scan(self):
+        with self._lock:
+            self._scan_locked()
+
+    def _scan_locked(self):
+        # 目录 mtime 没变说明没有增删文件，不用重新 listdir
+        try:
+            dir_mtime = os.stat(self.pic_dir).st_mtime
+        except FileNotFoundError:
+            print(f"[ERROR] 模板目录不存在: {self.pic_dir}")
+            return
+        if dir_mtime == self._dir_mtime:
+            return
+        if self._dir_mtime is None and self.atlas_path:
+            # 第一次扫描：先把 atlas 当缓存装进来，下面只有 mtime 对不上的 PNG 才会重新解码
+            templates, calibration = read_atlas(self.atlas_path, self.pic_dir) or ({}, None)
+            self.templates = templates
+            self._atlas_dirty = not templates
+            if calibration and not self.calibration['single'] and not self.calibration['family']:
+                # thresholds.json 不在（比如只拷了 pic/ 和 atlas 到另一台机器）就用 atlas 里存的阈值
+                self.calibration = calibration
+        self._dir_mtime = dir_mtime
+
+        names = set()
+        for file in os.listdir(self.pic_dir):
+            if file.endswith('.png') and not file[:-4].endswith(MASK_SUFFIX):
+                names.add(file[:-4])
+        for name in list(self.templates):
+            if name not in names:
+                del self.templates[name]
+                self._atlas_dirty = True
+        for name in names:
+            self._load(name)
+        self._index()
+        self.save_atlas()
+
+    def save_atlas(self):
+        """有模板从 PNG 重新读过（新增、修改、删除）就重写 atlas"""
+        with self._lock:
+            if not self._atlas_dirty or not self.atlas_path or not self.templates:
+                return
+            for template in self.templates.values():
+                template.detach()
+            try:
+                write_atlas(self.templates, self.atlas_path, self.calibration)
+                self._atlas_dirty = False
+            except OSError as e:
+                print(f"[WARN] 写 {self.atlas_path} 失败: {e}")
+
+    def _load(self, name):
+        with self._lock:
+            return self._load_locked(name)
+
+    def _load_locked(self, name):
+        path = os.path.join(self.pic_dir, name + '.png')
+        mask_path = os.path.join(self.pic_dir, name + MASK_SUFFIX + '.png')
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            if self.templates.pop(name, None) is not None:
+                self._atlas_dirty = True
+            return None
+        if os.path.exists(mask_path):
+            mtime = max(mtime, os.stat(mask_path).st_mtime)
+
+        cached = self.templates.get(name)
+        if cached is not None and cached.mtime == mtime:
+            return cached
+
+        bgr, mask = _read(path, mask_path)
+        if bgr is None:
+            print(f"[ERROR] 图片加载失败: {path}")
+            self.templates.pop(name, None)
+            return None
+        template = Template(name, path, mtime, bgr, mask)
+        self.templates[name] = template
+        self._atlas_dirty = True
+        return template
+
+    def _index(self):
+        families = {}
+        for name in self.templates:
+            prefix = family_of(name)
+            if prefix is not None:
+                families.setdefault(prefix, []).append(name)
+        for names in families.values():
+            names.sort(key=_family_order)
+        self.families = families
+
+    def get(self, name):
+        if name.endswith('.png'):
+            name = name[:-4]
+        self._scan()
+        if name not in self.templates:
+            return None
+        return self._load(name)
+
+    def names(self):
+        self._scan()
+        return sorted(self.templates)
+
+    def family(self, prefix):
+        """返回 prefix_1, prefix_2 ... 这一组模板，按编号排序"""
+        self._scan()
+        templates = []
+        for name in self.families.get(prefix, []):
+            template = self._load(name)
+            if template is not None:
+                templates.append(template)
+        return templates
+
+    def preload(self, names):
+        for name in names:
+            if self.get(name) is None and not self.family(name):
+                print(f"[WARN] 预加载模板不存在: {name}")
+
+
+registry = TemplateRegistry()
+atexit.register(registry.save_atlas)
+
+
+def redundant(prefix, min_score=0.95):
+    """一组模板里能被另一张（小的放进大的里比对）以 min_score 以上分数代替的，返回 [(多余的, 保留的, 分数)]"""
+    templates = registry.family(prefix)
+    pairs = []
+    for i, small in enumerate(templates):
+        for big in templates[:i]:
+            if small.w > big.w or small.h > big.h:
+                continue
+            result = cv2.matchTemplate(big.bgr, small.bgr, cv2.TM_CCOEFF_NORMED, mask=small.mask_view(True))
+            score = float(np.nan_to_num(result, nan=0.0, posinf=0.0, neginf=0.0).max())
+            if score >= min_score:
+                pairs.append((small.name, big.name, score))
+    return pairs
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['atlas']:
+        # python templates.py atlas：强制重建 atlas
+        registry.names()
+        registry._atlas_dirty = True
+        registry.save_atlas()
+        print(f"[INFO] 已写入 {registry.atlas_path}：{len(registry.templates)} 张模板")
+        sys.exit()
+
+    # 列出有遮罩 / 被裁过的模板，以及每次匹配少算多少像素
+    print(f"{'模板':<24}{'原尺寸':>10}{'裁后':>10}{'遮罩':>6}{'像素':>8}")
+    for name in registry.names():
+        entry = registry.get(name)
+        if entry.mask is None and (entry.w, entry.h) == (entry.full_w, entry.full_h):
+            continue
+        saved = 1 - entry.w * entry.h / (entry.full_w * entry.full_h)
+        print(f"{name:<24}{f'{entry.full_w}x{entry.full_h}':>10}{f'{entry.w}x{entry.h}':>10}"
+              f"{'有' if entry.mask is not None else '':>6}{-saved:>8.0%}")
+
+    for prefix in sorted(registry.families):
+        for extra, kept, score in redundant(prefix):
+            print(f"[INFO] {extra} 和 {kept} 几乎一样（{score:.3f}），可以考虑删掉 {extra}")
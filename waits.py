@@ -0,0 +1,181 @@
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from frame import Frame, screen_region
+from inputs import gui
+from matching import locate
+from templates import registry
+
+
+# event：画面变化后稳定 / 目标出现就提前返回，最多等原来的秒数；fixed：和以前一样死等
+WAIT_MODE = os.environ.get('AXIE_WAIT', 'event')
+
+SETTLE_SCALE = 0.125   # 比较前先缩到 1/8 灰度图，差分很便宜
+SETTLE_DIFF = 2.0      # 两张缩小图平均灰度差小于这个值算没变化
+SETTLE_POLL = 0.1
+SETTLE_STABLE = 2      # 连续几次没变化算稳定
+MIN_WAIT = 0.2         # 点击后画面可能还没开始变，至少等这么久再判断
+SETTLE_RADIUS = 200    # 没给 region 时只看鼠标周围这么大的一块（一般就是刚点过的位置）
+
+
+def near(x, y, radius=SETTLE_RADIUS):
+    """(x, y) 周围 radius 像素、裁到当前窗口以内的区域，给 wait(region=...) 用"""
+    sx1, sy1, sx2, sy2 = screen_region()
+    return max(sx1, x - radius), max(sy1, y - radius), min(sx2, x + radius), min(sy2, y + radius)
+
+
+def signature(region=None, frame=None):
+    """用来判断画面有没有变化的缩小灰度图"""
+    frame = frame or Frame.capture(region)
+    return frame.scaled(SETTLE_SCALE, color=False).astype(np.int16)
+
+
+def changed(previous, current, diff=SETTLE_DIFF):
+    if previous is None or previous.shape != current.shape:
+        return True
+    return float(np.mean(np.abs(current - previous))) >= diff
+
+
+def settle(timeout, region=None, min_wait=MIN_WAIT, poll=SETTLE_POLL, stable=SETTLE_STABLE, diff=SETTLE_DIFF):
+    """等画面（或 region 区域）变化之后再稳定下来，稳定返回 True，超过 timeout 秒返回 False
+
+    一直没看到变化不算稳定：点击之后界面可能要等服务器回应才开始变，这时和原来一样等满 timeout。
+    没给 region 时只看鼠标周围一小块，不用每 0.1 秒截整屏。
+    """
+    region = region or near(*gui.position())
+    start = gui.now()
+    previous = signature(region)
+    gui.sleep(min(min_wait, timeout))
+    moved = False
+    calm = 0
+    while gui.now() - start < timeout:
+        current = signature(region)
+        if changed(previous, current, diff):
+            moved = True
+            calm = 0
+        else:
+            calm += 1
+            if moved and calm >= stable:
+                return True
+        previous = current
+        gui.sleep(poll)
+    return False
+
+
+def until(name, timeout, gone=False, region=None, threshold=None, color=True, poll=SETTLE_POLL):
+    """等模板出现（gone=True 时等它消失），成功返回 True，超时返回 False；threshold 不传时用校准过的值"""
+    entry = registry.get(name)
+    if entry is None:
+        print(f"[ERROR] 图片不存在: {name}")
+        gui.sleep(timeout)
+        return False
+    start = gui.now()
+    while True:
+        found = locate(entry, threshold or registry.match_threshold(entry.name, color), region, color) is not None
+        if found != gone:
+            return True
+        if gui.now() - start >= timeout:
+            return False
+        gui.sleep(poll)
+
+
+def wait(seconds, region=None, appear=None, gone=None):
+    """代替点击、按键之后的固定 sleep
+
+    event 模式下：给了 appear / gone 就等那个模板出现 / 消失，否则等 region（默认鼠标周围）变化后稳定；
+    都最多等 seconds 秒，所以不会比原来的固定等待更慢。fixed 模式下直接 sleep。
+    """
+    if WAIT_MODE == 'fixed':
+        gui.sleep(seconds)
+        return True
+    if appear is not None:
+        return until(appear, seconds, region=region)
+    if gone is not None:
+        return until(gone, seconds, gone=True, region=region)
+    return settle(seconds, region)
+
+
+WaitResult = namedtuple('WaitResult', ['name', 'pos', 'elapsed', 'polls', 'matches', 'frame'])
+
+MIN_POLL = 0.1
+MAX_POLL = 1.0
+
+
+def _wait_for(names, mode, timeout, threshold, color, region, min_poll, max_poll):
+    """mode: any / all / gone。每次轮询只截一张图，画面没变就不重新匹配，画面不动时轮询间隔逐步拉长"""
+    entries = []
+    for name in names:
+        entry = registry.get(name)
+        if entry is None:
+            print(f"[ERROR] 图片不存在: {name}")
+        else:
+            entries.append(entry)
+
+    start = gui.now()
+    interval = min_poll
+    previous = None
+    found = {}
+    polls = matches = 0
+    while True:
+        frame = Frame.capture(region)
+        polls += 1
+        current = signature(frame=frame)
+        if changed(previous, current):
+            interval = min_poll
+            for entry in entries:
+                box = locate(entry, threshold or registry.match_threshold(entry.name, color), frame=frame, color=color)
+                matches += 1
+                found[entry.name] = box
+                if mode == 'any' and box is not None:
+                    break
+        else:
+            interval = min(interval * 2, max_poll)
+        previous = current
+
+        hits = [entry.name for entry in entries if found.get(entry.name) is not None]
+        elapsed = gui.now() - start
+        fired = None
+        if mode == 'any' and hits:
+            fired = hits[0]
+        elif mode == 'all' and entries and len(hits) == len(entries):
+            fired = hits[-1]
+        elif mode == 'gone' and not hits:
+            fired = entries[0].name if entries else None
+        if fired is not None or (mode == 'gone' and not entries):
+            box = found.get(fired)
+            pos = ((box[0] + box[2]) // 2, (box[1] + box[3]) // 2) if box else None
+            return WaitResult(fired, pos, elapsed, polls, matches, frame)
+
+        if timeout and elapsed >= timeout:
+            return None
+        gui.sleep(interval)
+
+
+def wait_any(names, timeout=45, threshold=None, color=True, region=None, min_poll=MIN_POLL, max_poll=MAX_POLL):
+    """等 names 里任意一张出现，返回 WaitResult（name 是先出现的那张），超时返回 None"""
+    result = _wait_for(names, 'any', timeout, threshold, color, region, min_poll, max_poll)
+    _report(names, result, "出现")
+    return result
+
+
+def wait_all(names, timeout=45, threshold=None, color=True, region=None, min_poll=MIN_POLL, max_poll=MAX_POLL):
+    """等 names 全部同时出现"""
+    result = _wait_for(names, 'all', timeout, threshold, color, region, min_poll, max_poll)
+    _report(names, result, "全部出现")
+    return result
+
+
+def wait_gone(names, timeout=45, threshold=None, color=True, region=None, min_poll=MIN_POLL, max_poll=MAX_POLL):
+    """等 names 全部消失"""
+    result = _wait_for(names, 'gone', timeout, threshold, color, region, min_poll, max_poll)
+    _report(names, result, "消失")
+    return result
+
+
+def _report(names, result, what):
+    if result is None:
+        print(f"[MISS] 等待 {names} {what} 超时")
+    else:
+        print(f"[INFO] {result.name} {what}，用时 {result.elapsed:.1f}s，截图 {result.polls} 次，匹配 {result.matches} 次")
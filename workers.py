@@ -0,0 +1,213 @@
+"""一台机器同时挂多个游戏窗口：每个窗口一个 worker 线程，各自跑自己的调度器
+
+    python workers.py --window a:0,0,960,540 --window b:960,0,1920,540 [--module axie_land]
+
+- 截图：所有窗口共用一张全屏截图，每个窗口只取自己那块；某个窗口刚有输入，它自己的那块才重新截。
+- 坐标：worker 里全屏找图只找自己的窗口，找到的坐标本来就是屏幕坐标，点击不用再换算。
+- 输入：同一时间只有一个窗口在操作鼠标键盘；按住的键 / 鼠标没松开之前、gui.exclusive() 里面都不会切到别的窗口，
+  切过去时先点一下窗口的 focus 位置，保证按键进的是这个窗口。
+"""
+import argparse
+import importlib
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from capture import get_backend, use_backend
+from frame import screen_region, window_region
+from inputs import INPUT_OPS, get_sink, use_thread_sink
+
+
+# focus：切到这个窗口操作前先点的屏幕坐标（比如标题栏），None 表示不点
+Window = namedtuple('Window', ['name', 'region', 'focus'])
+
+
+class SharedCapture:
+    """包在真正的截图后端外面：max_age 秒内的全屏截图大家共用，窗口有新输入后它那块才作废"""
+
+    def __init__(self, inner, max_age=0.1):
+        self.inner = inner
+        self.max_age = max_age
+        self.pixels = None
+        self.order = None
+        self.region = None
+        self.taken = 0.0
+        self.last_input = {}
+        self.captures = 0
+        self._lock = threading.Lock()
+
+    def size(self):
+        return self.inner.size()
+
+    def touched(self):
+        """当前窗口刚有输入，之前的截图对它不算数了"""
+        self.last_input[screen_region()] = time.perf_counter()
+
+    def _fresh(self, region):
+        if self.pixels is None:
+            return False
+        x1, y1, x2, y2 = self.region
+        if not (x1 <= region[0] and y1 <= region[1] and x2 >= region[2] and y2 >= region[3]):
+            return False
+        if time.perf_counter() - self.taken > self.max_age:
+            return False
+        return self.taken > self.last_input.get(screen_region(), 0.0)
+
+    def grab(self, region):
+        with self._lock:
+            if not self._fresh(region):
+                full = (0, 0, *self.inner.size())
+                self.taken = time.perf_counter()
+                pixels, order = self.inner.grab(full)
+                # 后端可能复用缓冲区，存一份自己的
+                self.pixels, self.order, self.region = pixels.copy(), order, full
+                self.captures += 1
+            x1, y1, x2, y2 = region
+            fx, fy = self.region[:2]
+            return self.pixels[y1 - fy:y2 - fy, x1 - fx:x2 - fx].copy(), self.order
+
+
+class InputLock:
+    """所有窗口共用一把：谁在操作、按住了哪些键"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.owner = None
+        self.held = set()
+
+
+class WindowSink:
+    """某个窗口的输入端：每次输入前拿到共用的输入锁，没有按住的键就马上放开"""
+
+    def __init__(self, inner, window, input_lock, capture=None):
+        self.inner = inner
+        self.window = window
+        self.input_lock = input_lock
+        self.capture = capture
+        self._holding = False
+        self._exclusive = 0
+
+    def _acquire(self):
+        if self._holding:
+            return
+        self.input_lock.lock.acquire()
+        self._holding = True
+        switched = self.input_lock.owner is not None and self.input_lock.owner != self.window.name
+        self.input_lock.owner = self.window.name
+        if switched and self.window.focus is not None:
+            self.inner.click(*self.window.focus)
+
+    def _release(self):
+        if self._holding and not self.input_lock.held and not self._exclusive:
+            self._holding = False
+            self.input_lock.lock.release()
+
+    @contextmanager
+    def exclusive(self):
+        """整个 with 里一直拿着输入锁：别的窗口切不进来，也就不会点它的 focus 把鼠标挪走"""
+        self._acquire()
+        self._exclusive += 1
+        try:
+            yield
+        finally:
+            self._exclusive -= 1
+            self._release()
+
+    def release_all(self):
+        """worker 退出时调用：松开这个窗口还按着的键和鼠标，放开输入锁，别让其他窗口一直等"""
+        if not self._holding:
+            return
+        for kind, key in list(self.input_lock.held):
+            try:
+                if kind == 'key':
+                    self.inner.keyUp(key)
+                else:
+                    self.inner.mouseUp(button=key)
+            except Exception as e:
+                print(f"[WARN] 窗口 {self.window.name} 松开 {key} 失败: {e!r}")
+        self.input_lock.held.clear()
+        self._exclusive = 0
+        self._release()
+
+    def __getattr__(self, name):
+        attr = getattr(self.inner, name)
+        if name not in INPUT_OPS:
+            return attr
+
+        def serialized(*args, **kwargs):
+            self._acquire()
+            try:
+                result = attr(*args, **kwargs)
+                if name in ('keyDown', 'keyUp'):
+                    held = ('key', args[0] if args else kwargs.get('key'))
+                elif name in ('mouseDown', 'mouseUp'):
+                    held = ('mouse', args[0] if args else kwargs.get('button', 'left'))
+                else:
+                    return result
+                if name.endswith('Down'):
+                    self.input_lock.held.add(held)
+                else:
+                    self.input_lock.held.discard(held)
+                return result
+            finally:
+                if self.capture is not None:
+                    self.capture.touched()
+                self._release()
+        return serialized
+
+
+def parse_window(text):
+    """'a:0,0,960,540' 或 'a:0,0,960,540@480,10'（@ 后面是 focus 坐标）"""
+    name, _, rest = text.partition(':')
+    region, _, focus = rest.partition('@')
+    region = tuple(int(v) for v in region.split(','))
+    if len(region) != 4:
+        raise ValueError(f"窗口区域要写成 x1,y1,x2,y2: {text}")
+    focus = tuple(int(v) for v in focus.split(',')) if focus else None
+    return Window(name, region, focus)
+
+
+def worker(window, module, input_lock, capture, sink):
+    window_sink = WindowSink(sink, window, input_lock, capture)
+    use_thread_sink(window_sink)
+    scheduler = module.workflow.scheduler(path=f'schedule_{window.name}.json', close_game=False)
+    with window_region(window.region):
+        try:
+            scheduler.run_forever()
+        except Exception as e:
+            print(f"[ERROR] 窗口 {window.name} 停止: {e!r}")
+            raise
+        finally:
+            window_sink.release_all()
+
+
+def run(windows, module_name='axie_land', max_age=0.1):
+    module = importlib.import_module(module_name)
+    module.workflow.preload()
+    capture = SharedCapture(get_backend(), max_age)
+    use_backend(capture)
+    input_lock = InputLock()
+    sink = get_sink()
+    threads = []
+    for window in windows:
+        thread = threading.Thread(target=worker, args=(window, module, input_lock, capture, sink),
+                                  name=f'window-{window.name}', daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同时挂多个游戏窗口")
+    parser.add_argument('--window', action='append', required=True, type=parse_window,
+                        help="名字:x1,y1,x2,y2[@focus_x,focus_y]，可以写多次")
+    parser.add_argument('--module', default='axie_land')
+    parser.add_argument('--max-age', type=float, default=0.1, help="共用截图最多用多少秒")
+    args = parser.parse_args()
+    run(args.window, args.module, args.max_age)
+
+
+if __name__ == '__main__':
+    main()
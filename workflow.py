@@ -0,0 +1,186 @@
+"""配置驱动的收菜流程：每个脚本只是一份 profile（哪些地、每块地做哪些步骤、冷却多久、任务参数）
+
+    PROFILE = {
+        'settings': {...},                  # 传给 tasks.configure()
+        'close_game': True,                 # 做完一批任务、下个任务还早时关游戏
+        'schedule': 'schedule.json',
+        'plots': {'105_128': [('discard', ('copper_ore',)), ('collect', (10, 1))], ...},
+        'cooldowns': {'collect': 5400, ...},
+    }
+
+步骤函数用 @step(...) 声明自己会找哪些模板（'{0}' 这种写法表示第几个参数），引擎据此：
+- 启动时一次预加载所有步骤的模板；
+- 跑一个步骤前，在后台预热下一个步骤的模板（包括缩小图）；
+- 步骤开始时截一张图，把 probe 里列的模板并行一次匹配完，步骤里第一次 image() 直接用结果。
+"""
+import threading
+import time
+from collections import namedtuple
+
+from frame import Frame
+from inputs import gui
+from matching import locate, parallel_map, pyramid_scale
+from metrics import metrics
+from scheduler import SCHEDULE_FILE, Job, Scheduler
+from templates import registry
+
+
+ACTIONS = {}
+
+StepInfo = namedtuple('StepInfo', ['templates', 'probe'])
+
+
+def step(*templates, probe=()):
+    """登记一个步骤函数：templates 是它可能用到的全部模板，probe 是开始时就要找的那几张"""
+    def register(func):
+        func.step = StepInfo(templates, probe)
+        ACTIONS[func.__name__] = func
+        return func
+    return register
+
+
+def _expand(names, args):
+    result = []
+    for name in names:
+        if '{' in name:
+            try:
+                name = name.format(*args)
+            except IndexError:
+                continue
+            if name == 'None':
+                continue
+        result.append(name)
+    return result
+
+
+def templates_of(func, args=()):
+    info = getattr(func, 'step', None)
+    return _expand(info.templates, args) if info else []
+
+
+def probe_of(func, args=()):
+    info = getattr(func, 'step', None)
+    return _expand(info.probe, args) if info else []
+
+
+class StepCache:
+    """步骤开始时那张图上的匹配结果；之后一有输入或者超过 max_age 秒就不再用。每个线程（窗口）各存各的"""
+
+    MISSING = object()
+
+    def __init__(self, max_age=0.5):
+        self.max_age = max_age
+        self._local = threading.local()
+
+    def fill(self, names):
+        entries = [entry for entry in (registry.get(name) for name in names) if entry is not None]
+        self._local.found = {}
+        if not entries:
+            return
+        frame = Frame.capture()
+        frame.bgr, frame.gray  # 并行匹配前先转好
+        boxes = parallel_map(lambda entry: locate(entry, registry.threshold(entry.name), frame=frame,
+                                                  gray_diff_threshold=registry.gray_diff(entry.name)), entries)
+        self._local.found = {entry.name: box for entry, box in zip(entries, boxes)}
+        self._local.inputs = gui.inputs
+        self._local.taken = time.perf_counter()
+
+    def get(self, name, threshold, color, gray_diff_threshold):
+        """和 fill() 用的参数（校准阈值、彩色）一样的调用才能用缓存；用不了返回 MISSING"""
+        found = getattr(self._local, 'found', {})
+        expected = (registry.threshold(name), True, registry.gray_diff(name))
+        if (threshold, color, gray_diff_threshold) != expected or name not in found:
+            return self.MISSING
+        if gui.inputs != self._local.inputs or time.perf_counter() - self._local.taken > self.max_age:
+            self._local.found = {}
+            return self.MISSING
+        return found.pop(name)
+
+
+step_cache = StepCache()
+
+
+def warm(names):
+    """把模板（以及金字塔匹配要用的缩小图）提前读进内存"""
+    for name in names:
+        entries = [registry.get(name)] if registry.get(name) is not None else registry.family(name)
+        for entry in entries:
+            scale = pyramid_scale(entry)
+            if scale is not None:
+                entry.scaled(scale, False)
+                entry.scaled(scale, True)
+
+
+class Workflow:
+    def __init__(self, profile):
+        self.profile = profile
+        self.enter = ACTIONS['enter_game']
+        self.switch = ACTIONS['switch_plot']
+        self.leave = ACTIONS['close_game'] if profile.get('close_game') else None
+        cooldowns = profile.get('cooldowns', {})
+        self.jobs = []
+        for plot, steps in profile['plots'].items():
+            for name, args in steps:
+                if name not in ACTIONS:
+                    raise ValueError(f"未知的步骤: {name}")
+                self.jobs.append(Job(plot, ACTIONS[name], tuple(args), cooldowns.get(name, 5400)))
+        self._prefetch = None
+
+    def steps(self):
+        """按 profile 顺序跑一整轮的步骤 [(函数, 参数)]"""
+        steps = [(self.enter, ())]
+        plot = None
+        for job in self.jobs:
+            if job.plot != plot:
+                plot = job.plot
+                steps.append((self.switch, (plot,)))
+            steps.append((job.func, job.args))
+        if self.leave is not None:
+            steps.append((self.leave, ()))
+        return steps
+
+    def preload(self):
+        names = []
+        for func, args in self.steps():
+            for name in templates_of(func, args):
+                if name not in names:
+                    names.append(name)
+        registry.preload(names)
+        warm(names)
+
+    def prefetch(self, func, args):
+        if self._prefetch is not None and self._prefetch.is_alive():
+            return
+        names = templates_of(func, args)
+        if names:
+            self._prefetch = threading.Thread(target=warm, args=(names,), name='prefetch', daemon=True)
+            self._prefetch.start()
+
+    def _next_step(self, func, args):
+        steps = self.steps()
+        for i, (f, a) in enumerate(steps[:-1]):
+            if f is func and tuple(a) == tuple(args):
+                return steps[i + 1]
+        return None
+
+    def run(self, func, args):
+        """跑一个步骤：预热下一步的模板，把这一步开头要找的模板在一张图上一次找完"""
+        following = self._next_step(func, args)
+        if following is not None:
+            self.prefetch(*following)
+        probe = probe_of(func, args)
+        if probe:
+            step_cache.fill(probe)
+        return func(*args)
+
+    def run_cycle(self, on_step=None):
+        for func, args in self.steps():
+            metrics.task = func.__name__
+            if on_step is not None:
+                on_step(func.__name__, args)
+            self.run(func, args)
+        metrics.task = None
+
+    def scheduler(self, path=None, close_game=True):
+        return Scheduler(self.jobs, self.enter, self.leave if close_game else None, self.switch,
+                         path=path or self.profile.get('schedule', SCHEDULE_FILE), runner=self.run)